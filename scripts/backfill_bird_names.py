@@ -8,7 +8,7 @@ This script will:
 3. Update the database records
 
 Usage:
-    # Run locally (requires psycopg2-binary and openai packages)
+    # Run locally (requires psycopg[binary] and openai packages)
     python scripts/backfill_bird_names.py
     
     # Run with dry-run to see what would be processed
@@ -22,24 +22,33 @@ Usage:
 
 Environment variables:
     OPENAI_API_KEY - OpenAI API key (required)
-    POSTGRES_HOST - PostgreSQL host (default: localhost, use 'postgres' in Docker)
+    POSTGRES_HOST - PostgreSQL host (default: localhost, use 'postgres' in Docker;
+                    'postgres', 'localhost' and 'host.docker.internal' are tried next)
     POSTGRES_PORT - PostgreSQL port (default: 5432)
     POSTGRES_DB - Database name (default: birdmonitor)
     POSTGRES_USER - Database user (default: birdmonitor)
     POSTGRES_PASSWORD - Database password (required)
+
+Durability:
+    The backfill session runs with synchronous_commit=off, so commits return
+    before the WAL is flushed. A database crash mid-backfill can lose the last
+    few batches of updates; they are idempotent and a re-run fills them in.
 """
 import os
 import sys
 import time
 import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from pathlib import Path
 
 # Add parent directory to path to import shared modules
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from shared.utils.openai_client import OpenAIBirdNamer
-import psycopg2
-import psycopg2.extras
+import psycopg
+from psycopg.rows import dict_row
 
 # Configure logging
 logging.basicConfig(
@@ -48,52 +57,169 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Auto-detect if running in Docker (check for /.dockerenv)
+IN_DOCKER = os.path.exists('/.dockerenv')
+
+POSTGRES_HOST = os.getenv('POSTGRES_HOST', 'postgres' if IN_DOCKER else 'localhost')
+POSTGRES_PORT = int(os.getenv('POSTGRES_PORT', 5432))
+POSTGRES_DB = os.getenv('POSTGRES_DB', 'birdmonitor')
+POSTGRES_USER = os.getenv('POSTGRES_USER', 'birdmonitor')
+POSTGRES_PASSWORD = os.getenv('POSTGRES_PASSWORD')
+OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
+
+# Seconds to wait on each candidate host before trying the next
+CONNECT_TIMEOUT = 3
+
+# Number of completed detections buffered before they are written in one batch
+UPDATE_BATCH_SIZE = 64
+
+# Session settings for bulk, re-runnable writes: don't wait on WAL fsync and
+# let concurrent commits share a flush. commit_delay needs superuser rights.
+SESSION_SETTINGS = [
+    "SET SESSION synchronous_commit = OFF",
+    "SET SESSION commit_delay = 100",
+    "SET SESSION commit_siblings = 5",
+]
+
+# Adaptive OpenAI concurrency: additive increase while responses are fast,
+# multiplicative decrease on failures or slow responses
+INITIAL_CONCURRENCY = 4
+MIN_CONCURRENCY = 2
+MAX_CONCURRENCY = 32
+CONCURRENCY_INCREASE = 0.5
+CONCURRENCY_BACKOFF = 0.5
+TARGET_LATENCY = 3.0  # seconds
+
+
+class AIMDLimiter:
+    """Bounds in-flight OpenAI requests with an AIMD-controlled limit."""
+    
+    def __init__(self, initial=INITIAL_CONCURRENCY, minimum=MIN_CONCURRENCY,
+                 maximum=MAX_CONCURRENCY, increase=CONCURRENCY_INCREASE,
+                 backoff=CONCURRENCY_BACKOFF, target_latency=TARGET_LATENCY,
+                 stop_event=None):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.increase = increase
+        self.backoff = backoff
+        self.target_latency = target_latency
+        self._in_flight = 0
+        self._latencies = deque(maxlen=20)
+        self._cond = threading.Condition()
+        self.stop_event = stop_event or threading.Event()
+    
+    def acquire(self):
+        """Block until a request slot is available; False once stopped."""
+        with self._cond:
+            self._cond.wait_for(lambda: self.stop_event.is_set() or self._in_flight < int(self.limit))
+            if self.stop_event.is_set():
+                return False
+            self._in_flight += 1
+            return True
+    
+    def stop(self):
+        """Set the stop event and wake every thread waiting for a slot."""
+        self.stop_event.set()
+        with self._cond:
+            self._cond.notify_all()
+    
+    def release(self, latency, ok):
+        """Return a slot and adjust the limit based on the request outcome."""
+        with self._cond:
+            self._in_flight -= 1
+            self._latencies.append(latency)
+            mean_latency = sum(self._latencies) / len(self._latencies)
+            if ok and mean_latency <= self.target_latency:
+                self.limit = min(self.maximum, self.limit + self.increase)
+            else:
+                self.limit = max(self.minimum, self.limit * self.backoff)
+            self._cond.notify_all()
+    
+    def call(self, func, *args):
+        """Run func under the limiter; a falsy result counts as a failure."""
+        if not self.acquire():
+            return None
+        start = time.monotonic()
+        result = None
+        try:
+            result = func(*args)
+            return result
+        finally:
+            self.release(time.monotonic() - start, bool(result))
+
 
 class BirdBackfill:
     def __init__(self):
         self.db_conn = None
         self.openai_namer = None
+        self._pending = []
+        # Set on Ctrl+C: workers, the limiter and OpenAI backoff all stop waiting
+        self.stop_event = threading.Event()
+        self.limiter = AIMDLimiter(stop_event=self.stop_event)
         
     def connect_database(self):
-        """Connect to PostgreSQL database."""
-        # Auto-detect if running in Docker (check for /.dockerenv or container hostname)
-        default_host = 'postgres' if os.path.exists('/.dockerenv') else 'localhost'
-        
-        config = {
-            'host': os.getenv('POSTGRES_HOST', default_host),
-            'port': int(os.getenv('POSTGRES_PORT', 5432)),
-            'database': os.getenv('POSTGRES_DB', 'birdmonitor'),
-            'user': os.getenv('POSTGRES_USER', 'birdmonitor'),
-            'password': os.getenv('POSTGRES_PASSWORD')
-        }
-        
-        if not config['password']:
+        """Connect to PostgreSQL, trying likely hosts in turn."""
+        if not POSTGRES_PASSWORD:
             logger.error("POSTGRES_PASSWORD environment variable is required")
             logger.error("If running locally, you may need to expose the database port or run the script in Docker")
             return False
         
-        try:
-            logger.info(f"Connecting to database at {config['host']}:{config['port']}...")
-            self.db_conn = psycopg2.connect(**config)
-            logger.info("✓ Connected to database")
+        # Configured host first, then the usual Docker / host locations
+        candidates = list(dict.fromkeys([POSTGRES_HOST, 'postgres', 'localhost', 'host.docker.internal']))
+        
+        last_error = None
+        for host in candidates:
+            try:
+                logger.info(f"Connecting to database at {host}:{POSTGRES_PORT}...")
+                self.db_conn = psycopg.connect(
+                    host=host,
+                    port=POSTGRES_PORT,
+                    dbname=POSTGRES_DB,
+                    user=POSTGRES_USER,
+                    password=POSTGRES_PASSWORD,
+                    connect_timeout=CONNECT_TIMEOUT,
+                    # Keep long backfills alive through NAT/firewall idle timeouts
+                    keepalives=1,
+                    keepalives_idle=30
+                )
+            except psycopg.OperationalError as e:
+                logger.warning(f"  Could not connect to {host}: {e}")
+                last_error = e
+                continue
+            logger.info(f"✓ Connected to database at {host}")
+            self.configure_session()
             return True
-        except Exception as e:
-            logger.error(f"Failed to connect to database: {e}")
-            if config['host'] == 'localhost':
-                logger.error("\nTip: If the database is in Docker, try one of these:")
-                logger.error("  1. Run the script inside Docker: docker exec bird-monitor-storage python /app/backfill_bird_names.py")
-                logger.error("  2. Expose postgres port in docker-compose.yml and use POSTGRES_HOST=localhost")
-                logger.error("  3. Set POSTGRES_HOST=postgres if running from another container")
-            return False
+        
+        logger.error(f"Failed to connect to database: {last_error}")
+        logger.error("\nTip: If the database is in Docker, try one of these:")
+        logger.error("  1. Run the script inside Docker: docker exec bird-monitor-storage python /app/scripts/backfill_bird_names.py")
+        logger.error("  2. Expose postgres port in docker-compose.yml and use POSTGRES_HOST=localhost")
+        logger.error("  3. Set POSTGRES_HOST=postgres if running from another container")
+        return False
+    
+    def configure_session(self):
+        """Apply SESSION_SETTINGS, skipping any the database user may not set."""
+        self.db_conn.autocommit = True
+        try:
+            for statement in SESSION_SETTINGS:
+                try:
+                    self.db_conn.execute(statement)
+                except psycopg.Error as e:
+                    logger.warning(f"Could not apply '{statement}': {e}")
+        finally:
+            self.db_conn.autocommit = False
     
     def init_openai(self):
         """Initialize OpenAI client."""
-        api_key = os.getenv('OPENAI_API_KEY')
-        if not api_key:
+        if not OPENAI_API_KEY:
             logger.error("OPENAI_API_KEY environment variable is required")
             return False
         
-        self.openai_namer = OpenAIBirdNamer(api_key=api_key)
+        # A batch job can wait out rate limits and outages, unlike live ingest
+        self.openai_namer = OpenAIBirdNamer(
+            api_key=OPENAI_API_KEY, max_tries=8, retry_cap=60.0, stop_event=self.stop_event
+        )
         if not self.openai_namer.enabled:
             logger.error("Failed to initialize OpenAI client")
             return False
@@ -101,132 +227,238 @@ class BirdBackfill:
         logger.info("✓ OpenAI client initialized")
         return True
     
-    def get_birds_needing_backfill(self):
-        """Get all bird detections that need names/backstories."""
-        with self.db_conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
+    def ensure_backfill_index(self):
+        """Make sure the partial index over rows still needing backfill is usable.
+        
+        The storage service declares it in its schema; this covers databases
+        that predate that, and rebuilds an INVALID index left behind by an
+        interrupted CONCURRENTLY build (IF NOT EXISTS would skip it). Failure
+        only costs speed, so it is logged rather than aborting the backfill.
+        """
+        # CREATE/DROP INDEX CONCURRENTLY cannot run inside a transaction block
+        self.db_conn.autocommit = True
+        try:
+            with self.db_conn.cursor() as cur:
+                cur.execute("""
+                    SELECT i.indisvalid
+                    FROM pg_index i
+                    JOIN pg_class c ON c.oid = i.indexrelid
+                    WHERE c.relname = 'ix_detections_backfill'
+                      AND c.relnamespace = current_schema()::regnamespace
+                """)
+                row = cur.fetchone()
+                if row and row[0]:
+                    return
+                if row:
+                    logger.warning("Rebuilding invalid index ix_detections_backfill")
+                    cur.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_detections_backfill")
+                logger.info("Creating index ix_detections_backfill...")
+                cur.execute("""
+                    CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_detections_backfill
+                    ON detections (timestamp DESC)
+                    WHERE is_bird = true
+                      AND (bird_name IS NULL OR bird_backstory IS NULL)
+                """)
+        except psycopg.Error as e:
+            logger.warning(f"Could not create backfill index, continuing without it: {e}")
+        finally:
+            self.db_conn.autocommit = False
+    
+    def count_birds_needing_backfill(self):
+        """Count bird detections that need names/backstories."""
+        with self.db_conn.cursor() as cur:
             cur.execute("""
-                SELECT id, image_path, timestamp, is_bird, bird_name, bird_backstory
+                SELECT count(*)
                 FROM detections
                 WHERE is_bird = true
                   AND (bird_name IS NULL OR bird_backstory IS NULL)
-                ORDER BY timestamp DESC
             """)
-            return cur.fetchall()
+            return cur.fetchone()[0]
+    
+    def iter_birds_needing_backfill(self, limit=None):
+        """Stream bird detections that need names/backstories, newest first."""
+        query = """
+            SELECT id, image_path, timestamp, bird_name,
+                   bird_name IS NULL AS need_name,
+                   bird_backstory IS NULL AS need_story
+            FROM detections
+            WHERE is_bird = true
+              AND (bird_name IS NULL OR bird_backstory IS NULL)
+            ORDER BY timestamp DESC
+        """
+        params = None
+        if limit:
+            query += " LIMIT %s"
+            params = (limit,)
+        
+        # Server-side cursor: rows arrive in pages of itersize instead of all at
+        # once. withhold keeps it open across the batch commits in _flush.
+        with self.db_conn.cursor(
+            name='backfill_cur',
+            row_factory=dict_row,
+            withhold=True
+        ) as cur:
+            cur.itersize = 1000
+            cur.execute(query, params)
+            yield from cur
     
     def update_detection(self, detection_id, bird_name, bird_backstory):
-        """Update a detection with bird name and backstory."""
-        with self.db_conn.cursor() as cur:
-            cur.execute("""
+        """Queue a detection update; written to the database in batches.
+        
+        None leaves the existing column value in place.
+        """
+        self._pending.append((detection_id, bird_name, bird_backstory))
+        self._flush(force=False)
+    
+    def _flush(self, force=False):
+        """Write buffered updates in one pipelined round trip and commit once."""
+        if not self._pending or (not force and len(self._pending) < UPDATE_BATCH_SIZE):
+            return
+        
+        # Pipeline mode sends every UPDATE before waiting for any result
+        with self.db_conn.pipeline(), self.db_conn.cursor() as cur:
+            cur.executemany("""
                 UPDATE detections
-                SET bird_name = %s, bird_backstory = %s
+                SET bird_name = COALESCE(%s, bird_name),
+                    bird_backstory = COALESCE(%s, bird_backstory)
                 WHERE id = %s
-            """, (bird_name, bird_backstory, detection_id))
-            self.db_conn.commit()
+            """, [(name, backstory, detection_id) for detection_id, name, backstory in self._pending])
+        self.db_conn.commit()
+        logger.info(f"  Wrote {len(self._pending)} updates to database")
+        self._pending = []
     
     def backfill(self, dry_run=False, limit=None):
         """Backfill bird names and backstories."""
+        if not dry_run:
+            self.ensure_backfill_index()
+        
         logger.info("Fetching bird detections needing backfill...")
-        birds = self.get_birds_needing_backfill()
+        total = self.count_birds_needing_backfill()
         
-        total = len(birds)
         if limit:
-            birds = birds[:limit]
-            logger.info(f"Limited to {len(birds)} detections (out of {total} total)")
+            count = min(limit, total)
+            logger.info(f"Limited to {count} detections (out of {total} total)")
         else:
+            count = total
             logger.info(f"Found {total} bird detections needing backfill")
         
-        if not birds:
+        if not count:
             logger.info("No birds need backfilling!")
             return
         
+        birds = self.iter_birds_needing_backfill(limit)
+        
         if dry_run:
             logger.info("DRY RUN MODE - No changes will be made")
             for bird in birds:
                 logger.info(f"  Would process: ID {bird['id']}, {bird['image_path']}, {bird['timestamp']}")
             return
         
-        logger.info(f"Starting backfill for {len(birds)} detections...")
+        logger.info(f"Starting backfill for {count} detections...")
         logger.info("Press Ctrl+C to stop at any time\n")
         
         success_count = 0
         error_count = 0
-        skipped_count = 0
         
-        for i, bird in enumerate(birds, 1):
-            detection_id = bird['id']
-            image_path = bird['image_path']
-            timestamp = bird['timestamp']
-            
-            # Skip if already has both name and backstory
-            if bird['bird_name'] and bird['bird_backstory']:
-                logger.info(f"[{i}/{len(birds)}] Skipping ID {detection_id} - already has name and backstory")
-                skipped_count += 1
-                continue
-            
-            logger.info(f"[{i}/{len(birds)}] Processing ID {detection_id}: {image_path} ({timestamp})")
-            
-            try:
-                # Check what we already have
-                existing_name = bird['bird_name']
-                existing_backstory = bird['bird_backstory']
-                
-                bird_name = existing_name
-                bird_backstory = existing_backstory
+        # Worker threads only talk to OpenAI; database writes stay on this thread.
+        # Submissions are windowed so at most 2 * MAX_CONCURRENCY rows are in flight.
+        executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENCY)
+        pending = {}
+        completed = 0
+        try:
+            exhausted = False
+            while pending or not exhausted:
+                while not exhausted and len(pending) < 2 * MAX_CONCURRENCY:
+                    bird = next(birds, None)
+                    if bird is None:
+                        exhausted = True
+                        break
+                    pending[executor.submit(self._generate, bird)] = bird
                 
-                # Generate missing pieces
-                if not bird_name:
-                    logger.info(f"  Generating name...")
-                    bird_name = self.openai_namer.generate_bird_name()
-                    if not bird_name:
-                        logger.warning(f"  Failed to generate name for ID {detection_id}")
-                        error_count += 1
-                        continue
-                    logger.info(f"  Generated name: {bird_name}")
+                if not pending:
+                    break
                 
-                if not bird_backstory:
-                    logger.info(f"  Generating backstory for {bird_name}...")
-                    bird_backstory = self.openai_namer.generate_bird_backstory(bird_name)
-                    if not bird_backstory:
-                        logger.warning(f"  Failed to generate backstory for ID {detection_id}")
-                        # Still update with just the name if we generated it
-                        if not existing_name:
-                            self.update_detection(detection_id, bird_name, None)
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    bird = pending.pop(future)
+                    completed += 1
+                    logger.info(f"[{completed}/{count}] ID {bird['id']}: {bird['image_path']} ({bird['timestamp']})")
+                    try:
+                        bird_name, bird_backstory = future.result()
+                        if self._apply_result(bird, bird_name, bird_backstory):
                             success_count += 1
-                            logger.info(f"  ✓ Updated with name: {bird_name}")
                         else:
                             error_count += 1
-                        continue
-                    logger.info(f"  Generated backstory")
-                
-                # Update database
-                self.update_detection(detection_id, bird_name, bird_backstory)
-                success_count += 1
-                if existing_name:
-                    logger.info(f"  ✓ Updated backstory for {bird_name}")
-                else:
-                    logger.info(f"  ✓ Updated: {bird_name}")
-                logger.debug(f"     Backstory: {bird_backstory[:100]}...")
-                
-                # Rate limiting - be nice to OpenAI API
-                if i < len(birds):
-                    time.sleep(1)  # 1 second delay between requests
-                    
-            except KeyboardInterrupt:
-                logger.info("\n\nInterrupted by user")
-                break
-            except Exception as e:
-                logger.error(f"  ✗ Error processing ID {detection_id}: {e}")
-                error_count += 1
-                continue
+                    except Exception as e:
+                        logger.error(f"  ✗ Error processing ID {bird['id']}: {e}")
+                        error_count += 1
+        except KeyboardInterrupt:
+            logger.info("\n\nInterrupted by user")
+            # Running workers would otherwise keep sleeping in backoff, and the
+            # interpreter joins them at exit
+            self.limiter.stop()
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+            birds.close()
+        
+        # Persist whatever completed, including after Ctrl+C
+        self._flush(force=True)
         
         logger.info(f"\n{'='*60}")
         logger.info(f"Backfill complete!")
         logger.info(f"  Success: {success_count}")
         logger.info(f"  Errors: {error_count}")
-        logger.info(f"  Skipped: {skipped_count}")
-        logger.info(f"  Total processed: {success_count + error_count + skipped_count}")
+        logger.info(f"  Total processed: {success_count + error_count}")
         logger.info(f"{'='*60}")
     
+    def _generate(self, bird):
+        """Generate the missing name and/or backstory for one detection (worker thread).
+        
+        Returns (new_name, new_backstory); each is None if it was not needed or failed.
+        """
+        if self.stop_event.is_set():
+            return None, None
+        bird_name = bird['bird_name']
+        new_name = None
+        new_backstory = None
+        
+        if bird['need_name']:
+            new_name = self.limiter.call(self.openai_namer.generate_bird_name)
+            if not new_name:
+                return None, None
+            bird_name = new_name
+        
+        if bird['need_story']:
+            new_backstory = self.limiter.call(self.openai_namer.generate_bird_backstory, bird_name)
+        
+        return new_name, new_backstory
+    
+    def _apply_result(self, bird, new_name, new_backstory):
+        """Queue the database update for a generated result. Returns True on success."""
+        detection_id = bird['id']
+        
+        if bird['need_name'] and not new_name:
+            logger.warning(f"  Failed to generate name for ID {detection_id}")
+            return False
+        
+        if bird['need_story'] and not new_backstory:
+            logger.warning(f"  Failed to generate backstory for ID {detection_id}")
+            # Still update with just the name if we generated it
+            if not new_name:
+                return False
+            self.update_detection(detection_id, new_name, None)
+            logger.info(f"  ✓ Updated with name: {new_name}")
+            return True
+        
+        self.update_detection(detection_id, new_name, new_backstory)
+        if bird['need_name']:
+            logger.info(f"  ✓ Updated: {new_name}")
+        else:
+            logger.info(f"  ✓ Updated backstory for {bird['bird_name']}")
+        if new_backstory:
+            logger.debug(f"     Backstory: {new_backstory[:100]}...")
+        return True
+    
     def close(self):
         """Close database connection."""
         if self.db_conn:
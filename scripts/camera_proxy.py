@@ -4,12 +4,14 @@ Simple HTTP proxy for camera stream to make it accessible from Docker.
 Reads from FFmpeg MJPEG stream and serves it via HTTP on all interfaces.
 """
 import http.server
-import socketserver
+import shutil
 import urllib.request
 import sys
 
 STREAM_URL = "http://localhost:8082/preview.mjpg"
 PROXY_PORT = 8084
+# Copy buffer for relaying the stream; large writes let the socket coalesce
+COPY_CHUNK_SIZE = 64 * 1024
 
 class CameraProxyHandler(http.server.BaseHTTPRequestHandler):
     def do_HEAD(self):
@@ -33,13 +35,12 @@ class CameraProxyHandler(http.server.BaseHTTPRequestHandler):
                 self.end_headers()
                 
                 # Stream data
-                while True:
-                    chunk = stream.read(8192)
-                    if not chunk:
-                        break
-                    self.wfile.write(chunk)
-                    self.wfile.flush()
+                with stream:
+                    shutil.copyfileobj(stream, self.wfile, length=COPY_CHUNK_SIZE)
                     
+            except (BrokenPipeError, ConnectionResetError):
+                # Client disconnected
+                pass
             except Exception as e:
                 print(f"Error proxying stream: {e}", file=sys.stderr)
                 self.send_error(503, "Stream unavailable")
@@ -51,7 +52,8 @@ class CameraProxyHandler(http.server.BaseHTTPRequestHandler):
         pass
 
 if __name__ == "__main__":
-    with socketserver.TCPServer(("0.0.0.0", PROXY_PORT), CameraProxyHandler) as httpd:
+    # One thread per client so a long-lived stream never blocks other requests
+    with http.server.ThreadingHTTPServer(("0.0.0.0", PROXY_PORT), CameraProxyHandler) as httpd:
         print(f"Camera proxy listening on 0.0.0.0:{PROXY_PORT}")
         print(f"Proxying: {STREAM_URL}")
         print(f"Access from Docker: http://host.docker.internal:{PROXY_PORT}/preview.mjpg")
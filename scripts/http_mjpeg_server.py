@@ -2,11 +2,81 @@
 """
 Simple HTTP server for MJPEG streaming.
 Reads MJPEG data from stdin (piped from ffmpeg) and serves it via HTTP.
+
+One reader thread splits stdin into JPEG frames and publishes the newest
+one; every client streams from that shared frame instead of reading stdin.
 """
 import sys
 import threading
-from http.server import HTTPServer, BaseHTTPRequestHandler
-from io import BytesIO
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# JPEG frame markers
+JPEG_SOI = b'\xff\xd8'  # Start of Image
+JPEG_EOI = b'\xff\xd9'  # End of Image
+
+# Multipart boundary plus part header; only the length is formatted per frame
+PART_HEADER_FMT = b'\r\n--ffmpeg\r\nContent-Type: image/jpeg\r\nContent-Length: %d\r\n\r\n'
+
+class FrameBuffer:
+    """
+    Latest frame read from stdin, published by a single reader thread.
+    
+    Clients wait on cond and send the newest frame; slow clients skip frames
+    instead of falling behind.
+    """
+    
+    def __init__(self):
+        self.frame = None
+        self.frame_id = 0
+        self.done = False
+        self.cond = threading.Condition()
+    
+    def publish(self, frame):
+        with self.cond:
+            self.frame = frame
+            self.frame_id += 1
+            self.cond.notify_all()
+    
+    def close(self):
+        with self.cond:
+            self.done = True
+            self.cond.notify_all()
+    
+    def wait_newer(self, last_id):
+        """Return (frame, frame_id) newer than last_id, or (None, last_id) once stdin ends."""
+        with self.cond:
+            self.cond.wait_for(lambda: self.frame_id > last_id or self.done)
+            if self.frame_id == last_id:
+                return None, last_id
+            return self.frame, self.frame_id
+
+frames = FrameBuffer()
+
+def read_frames(stream, target):
+    """Split stream into JPEG frames (SOI ... EOI) and publish them until EOF."""
+    buffer = bytearray()
+    try:
+        while True:
+            chunk = stream.read1(65536)
+            if not chunk:
+                break
+            buffer.extend(chunk)
+            while True:
+                soi = buffer.find(JPEG_SOI)
+                if soi < 0:
+                    # Keep a trailing byte in case the marker straddles reads
+                    del buffer[:max(0, len(buffer) - 1)]
+                    break
+                eoi = buffer.find(JPEG_EOI, soi + 2)
+                if eoi < 0:
+                    del buffer[:soi]
+                    break
+                target.publish(bytes(buffer[soi:eoi + 2]))
+                del buffer[:eoi + 2]
+    except (OSError, ValueError) as e:
+        print(f"Error reading stdin: {e}", file=sys.stderr)
+    finally:
+        target.close()
 
 class MJPEGHandler(BaseHTTPRequestHandler):
     """HTTP handler that serves MJPEG stream."""
@@ -21,15 +91,16 @@ class MJPEGHandler(BaseHTTPRequestHandler):
             self.send_header('Expires', '0')
             self.end_headers()
             
-            # Stream MJPEG frames from stdin
+            # Stream the newest frame published by the reader thread
             try:
+                last_id = 0
                 while True:
-                    # Read frame data (this is a simplified version)
-                    # In practice, we'd need to properly parse MJPEG boundaries
-                    chunk = sys.stdin.buffer.read(8192)
-                    if not chunk:
+                    frame, last_id = frames.wait_newer(last_id)
+                    if frame is None:
+                        # stdin closed
                         break
-                    self.wfile.write(chunk)
+                    self.wfile.write(PART_HEADER_FMT % len(frame))
+                    self.wfile.write(frame)
                     self.wfile.flush()
             except (BrokenPipeError, ConnectionResetError):
                 pass  # Client disconnected
@@ -44,7 +115,10 @@ class MJPEGHandler(BaseHTTPRequestHandler):
 
 def run_server(port=8081):
     """Run the HTTP server."""
-    server = HTTPServer(('0.0.0.0', port), MJPEGHandler)
+    threading.Thread(
+        target=read_frames, args=(sys.stdin.buffer, frames), name='stdin-reader', daemon=True
+    ).start()
+    server = ThreadingHTTPServer(('0.0.0.0', port), MJPEGHandler)
     print(f"HTTP MJPEG server started on port {port}")
     print(f"Stream available at: http://localhost:{port}/stream.mjpg")
     try:
@@ -56,4 +130,3 @@ def run_server(port=8081):
 if __name__ == '__main__':
     port = int(sys.argv[1]) if len(sys.argv) > 1 else 8081
     run_server(port)
-
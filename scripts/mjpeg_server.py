@@ -2,14 +2,20 @@
 """
 MJPEG HTTP server that proxies FFmpeg stream and binds to all interfaces.
 This ensures Docker can access the camera stream.
+
+A single FFmpeg process keeps the camera open and produces two JPEG streams:
+a low-resolution preview (/preview.mjpg) and a full-resolution, high-quality
+stream whose latest frame is served as /snapshot.jpg.
 """
 import http.server
-import socketserver
+import selectors
 import subprocess
 import sys
 import signal
 import os
 import time
+import threading
+from collections import deque
 
 HTTP_PORT = int(os.getenv('HTTP_PORT', 8082))
 CAMERA_DEVICE = os.getenv('CAMERA_DEVICE', '0')
@@ -18,28 +24,111 @@ PREVIEW_WIDTH = os.getenv('PREVIEW_WIDTH', '640')
 CAPTURE_RES = os.getenv('CAPTURE_RES', '1280x720')
 PREVIEW_Q = os.getenv('PREVIEW_Q', '7')
 
-# FFmpeg command - output to stdout as MJPEG stream
-# Use image2pipe format to get individual JPEG frames that we can wrap in multipart
-FFMPEG_CMD = [
-    'ffmpeg',
-    '-hide_banner',
-    '-loglevel', 'warning',
-    '-f', 'avfoundation',
-    '-framerate', PREVIEW_FPS,
-    '-video_size', CAPTURE_RES,
-    '-pixel_format', 'uyvy422',
-    '-i', f'{CAMERA_DEVICE}:none',
-    '-vf', f'scale={PREVIEW_WIDTH}:-2,format=yuvj422p',
-    '-c:v', 'mjpeg',
-    '-q:v', PREVIEW_Q,
-    '-r', PREVIEW_FPS,
-    '-f', 'image2pipe',
-    '-vcodec', 'mjpeg',
-    '-'  # Output to stdout
-]
+PREVIEW_QSV_QUALITY = os.getenv('PREVIEW_QSV_QUALITY', '80')
+# High-quality snapshot stream (full CAPTURE_RES); low fps keeps encode cost down
+SNAPSHOT_FPS = os.getenv('SNAPSHOT_FPS', '2')
+SNAPSHOT_Q = os.getenv('SNAPSHOT_QUALITY', '2')
+
+def probe_encoders():
+    """Return the encoder list reported by `ffmpeg -encoders` (empty on failure)."""
+    try:
+        result = subprocess.run(
+            ['ffmpeg', '-hide_banner', '-encoders'],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, timeout=10
+        )
+        return result.stdout.decode('utf-8', errors='ignore')
+    except (OSError, subprocess.SubprocessError):
+        return ''
+
+def build_ffmpeg_cmd(snapshot_fd, encoders=''):
+    """
+    Build the FFmpeg command that writes individual JPEG frames to two pipes.
+    
+    Preview frames go to stdout and snapshot frames to snapshot_fd. The preview
+    uses the Intel Quick Sync MJPEG encoder when FFmpeg reports it, otherwise
+    multi-threaded software MJPEG with 4:2:0 chroma (less encode work than 4:2:2).
+    """
+    if 'mjpeg_qsv' in encoders:
+        pixel_format = 'nv12'
+        codec = ['-c:v', 'mjpeg_qsv', '-global_quality', PREVIEW_QSV_QUALITY]
+    else:
+        pixel_format = 'yuvj420p'
+        codec = ['-c:v', 'mjpeg', '-q:v', PREVIEW_Q, '-threads', '0']
+    
+    # Use image2pipe format to get individual JPEG frames that we can wrap in multipart
+    return [
+        'ffmpeg',
+        '-hide_banner',
+        '-loglevel', 'warning',
+        # Low-latency input: don't buffer frames before decoding
+        '-fflags', 'nobuffer',
+        '-flags', 'low_delay',
+        '-f', 'avfoundation',
+        '-framerate', PREVIEW_FPS,
+        '-video_size', CAPTURE_RES,
+        '-pixel_format', 'uyvy422',
+        '-i', f'{CAMERA_DEVICE}:none',
+        '-filter_complex',
+        f'[0:v]split=2[low][high];'
+        f'[low]scale={PREVIEW_WIDTH}:-2,format={pixel_format}[preview];'
+        f'[high]fps={SNAPSHOT_FPS},format=yuvj422p[snapshot]',
+        '-map', '[preview]',
+        *codec,
+        '-r', PREVIEW_FPS,
+        '-f', 'image2pipe',
+        'pipe:1',  # Preview to stdout
+        '-map', '[snapshot]',
+        '-c:v', 'mjpeg',
+        '-q:v', SNAPSHOT_Q,
+        '-f', 'image2pipe',
+        f'pipe:{snapshot_fd}'
+    ]
+
+# JPEG frame markers
+JPEG_SOI = b'\xff\xd8'  # Start of Image
+JPEG_EOI = b'\xff\xd9'  # End of Image
+
+# Multipart boundary plus part header; only the length is formatted per frame
+PART_HEADER_FMT = b'\r\n--ffmpeg\r\nContent-Type: image/jpeg\r\nContent-Length: %d\r\n\r\n'
 
 ffmpeg_proc = None
 
+class FrameBuffer:
+    """
+    Latest frames of one FFmpeg output, published by a single reader thread.
+    
+    Clients wait on cond and send the newest frame; slow clients skip frames
+    instead of falling behind.
+    """
+    
+    def __init__(self):
+        self.frames = deque(maxlen=2)
+        self.frame_id = 0
+        self.done = False
+        self.cond = threading.Condition()
+    
+    def publish(self, frame):
+        with self.cond:
+            self.frames.append(frame)
+            self.frame_id += 1
+            self.cond.notify_all()
+    
+    def close(self):
+        with self.cond:
+            self.done = True
+            self.cond.notify_all()
+    
+    def wait_newer(self, last_id, timeout=None):
+        """Return (frame, frame_id) newer than last_id, or (None, last_id) if none arrives."""
+        with self.cond:
+            self.cond.wait_for(lambda: self.frame_id > last_id or self.done, timeout)
+            if self.frame_id == last_id:
+                return None, last_id
+            return self.frames[-1], self.frame_id
+
+preview_frames = FrameBuffer()
+snapshot_frames = FrameBuffer()
+
 def cleanup(signum, frame):
     """Clean up FFmpeg process on exit."""
     global ffmpeg_proc
@@ -51,6 +140,73 @@ def cleanup(signum, frame):
 signal.signal(signal.SIGTERM, cleanup)
 signal.signal(signal.SIGINT, cleanup)
 
+def writev_all(fd, parts):
+    """Write all buffers to fd with as few writev() syscalls as possible."""
+    parts = [memoryview(p) for p in parts]
+    while parts:
+        written = os.writev(fd, parts)
+        while parts and written >= len(parts[0]):
+            written -= len(parts[0])
+            parts.pop(0)
+        if parts and written:
+            parts[0] = parts[0][written:]
+
+def read_frames(in_fd, target):
+    """Read one FFmpeg output pipe, split it into JPEG frames and publish them."""
+    selector = selectors.DefaultSelector()
+    selector.register(in_fd, selectors.EVENT_READ)
+    
+    # Frames are cut out of a bytearray in place; soi/scan persist
+    # across reads so bytes already searched are not rescanned
+    buffer = bytearray()
+    soi = -1
+    scan = 0
+    try:
+        while ffmpeg_proc.poll() is None:
+            # Read data from FFmpeg (pipe is non-blocking)
+            if not selector.select(timeout=1.0):
+                continue
+            try:
+                chunk = os.read(in_fd, 65536)
+            except BlockingIOError:
+                continue
+            if not chunk:
+                # EOF from FFmpeg
+                break
+            buffer.extend(chunk)
+            
+            # Look for complete JPEG frames (SOI ... EOI)
+            while True:
+                if soi < 0:
+                    soi = buffer.find(JPEG_SOI, scan)
+                    if soi < 0:
+                        # Marker may straddle the next read
+                        scan = max(0, len(buffer) - 1)
+                        break
+                    scan = soi + 2
+                
+                eoi = buffer.find(JPEG_EOI, scan)
+                if eoi < 0:
+                    # Incomplete frame, wait for more data
+                    scan = max(soi + 2, len(buffer) - 1)
+                    break
+                
+                frame = bytes(memoryview(buffer)[soi:eoi + 2])
+                del buffer[:eoi + 2]
+                soi = -1
+                scan = 0
+                target.publish(frame)
+    except (OSError, ValueError) as e:
+        print(f"Error reading FFmpeg output: {e}", file=sys.stderr)
+    finally:
+        selector.close()
+        target.close()
+
+def start_producer(in_fd, target, name):
+    """Start a background thread that feeds frames from in_fd to target."""
+    os.set_blocking(in_fd, False)
+    threading.Thread(target=read_frames, args=(in_fd, target), name=name, daemon=True).start()
+
 class MJPEGHandler(http.server.BaseHTTPRequestHandler):
     def do_HEAD(self):
         if self.path == '/preview.mjpg':
@@ -74,51 +230,21 @@ class MJPEGHandler(http.server.BaseHTTPRequestHandler):
                 self.send_header('Connection', 'close')
                 self.end_headers()
                 
-                # Read JPEG frames from FFmpeg and wrap them in multipart format
-                # FFmpeg outputs individual JPEG frames via image2pipe
+                # Send the newest frame published by the reader thread,
+                # wrapped in multipart format
                 try:
-                    import select
-                    
-                    # JPEG frame markers
-                    JPEG_SOI = b'\xff\xd8'  # Start of Image
-                    JPEG_EOI = b'\xff\xd9'  # End of Image
-                    
-                    buffer = b''
+                    out_fd = self.wfile.fileno()
+                    last_id = 0
                     while True:
-                        # Check if FFmpeg is still running
-                        if ffmpeg_proc.poll() is not None:
+                        frame, last_id = preview_frames.wait_newer(last_id)
+                        if frame is None:
+                            # FFmpeg exited
                             break
                         
-                        # Read data from FFmpeg
-                        ready, _, _ = select.select([ffmpeg_proc.stdout], [], [], 0.1)
-                        if ready:
-                            chunk = ffmpeg_proc.stdout.read(8192)
-                            if chunk:
-                                buffer += chunk
-                                
-                                # Look for complete JPEG frames (SOI ... EOI)
-                                while JPEG_SOI in buffer and JPEG_EOI in buffer:
-                                    soi_pos = buffer.find(JPEG_SOI)
-                                    eoi_pos = buffer.find(JPEG_EOI, soi_pos)
-                                    
-                                    if eoi_pos != -1:
-                                        # Found complete frame
-                                        frame = buffer[soi_pos:eoi_pos + 2]
-                                        buffer = buffer[eoi_pos + 2:]
-                                        
-                                        # Write multipart boundary and frame
-                                        boundary = b'\r\n--ffmpeg\r\n'
-                                        header = b'Content-Type: image/jpeg\r\nContent-Length: ' + str(len(frame)).encode() + b'\r\n\r\n'
-                                        self.wfile.write(boundary + header + frame)
-                                        self.wfile.flush()
-                                    else:
-                                        # Incomplete frame, wait for more data
-                                        break
-                            else:
-                                # EOF from FFmpeg
-                                break
+                        # Part header and frame go out in a single writev()
+                        writev_all(out_fd, [PART_HEADER_FMT % len(frame), frame])
                 except (BrokenPipeError, ConnectionResetError, OSError, ValueError):
-                    # Client disconnected or pipe closed - that's fine
+                    # Client disconnected - that's fine
                     pass
             except Exception as e:
                 print(f"Error serving stream: {e}", file=sys.stderr)
@@ -126,6 +252,19 @@ class MJPEGHandler(http.server.BaseHTTPRequestHandler):
                     self.send_error(503, "Stream unavailable")
                 except:
                     pass
+        elif self.path == '/snapshot.jpg':
+            # Latest high-quality frame; FFmpeg keeps the camera open so there is
+            # no per-request device start-up
+            frame, _ = snapshot_frames.wait_newer(0, timeout=5.0)
+            if frame is None:
+                self.send_error(503, "Snapshot unavailable")
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', 'image/jpeg')
+            self.send_header('Content-Length', str(len(frame)))
+            self.send_header('Cache-Control', 'no-cache, no-store, must-revalidate')
+            self.end_headers()
+            self.wfile.write(frame)
         else:
             self.send_error(404, "Not found")
     
@@ -134,14 +273,19 @@ class MJPEGHandler(http.server.BaseHTTPRequestHandler):
         pass
 
 if __name__ == "__main__":
-    # Start FFmpeg process - output to stdout
-    print(f"Starting FFmpeg...", file=sys.stderr)
+    # Start FFmpeg process - preview to stdout, snapshots to a second pipe
+    snapshot_read_fd, snapshot_write_fd = os.pipe()
+    ffmpeg_cmd = build_ffmpeg_cmd(snapshot_write_fd, probe_encoders())
+    print(f"Starting FFmpeg: {' '.join(ffmpeg_cmd)}", file=sys.stderr)
     ffmpeg_proc = subprocess.Popen(
-        FFMPEG_CMD,
+        ffmpeg_cmd,
         stdout=subprocess.PIPE,
         stderr=subprocess.PIPE,
+        pass_fds=(snapshot_write_fd,),
         bufsize=0  # Unbuffered
     )
+    # Only FFmpeg writes the snapshot pipe; close our copy so EOF propagates
+    os.close(snapshot_write_fd)
     
     # Wait a moment for FFmpeg to start
     time.sleep(2)
@@ -152,11 +296,16 @@ if __name__ == "__main__":
         print(f"FFmpeg failed to start: {stderr}", file=sys.stderr)
         sys.exit(1)
     
+    start_producer(ffmpeg_proc.stdout.fileno(), preview_frames, 'preview-reader')
+    start_producer(snapshot_read_fd, snapshot_frames, 'snapshot-reader')
+    
     # Start HTTP server on all interfaces
     print(f"MJPEG server listening on 0.0.0.0:{HTTP_PORT}", file=sys.stderr)
     print(f"Stream available at: http://0.0.0.0:{HTTP_PORT}/preview.mjpg", file=sys.stderr)
+    print(f"Snapshot available at: http://0.0.0.0:{HTTP_PORT}/snapshot.jpg", file=sys.stderr)
     
-    with socketserver.TCPServer(("0.0.0.0", HTTP_PORT), MJPEGHandler) as httpd:
+    # One thread per client so a long-lived stream never blocks other requests
+    with http.server.ThreadingHTTPServer(("0.0.0.0", HTTP_PORT), MJPEGHandler) as httpd:
         try:
             httpd.serve_forever()
         except KeyboardInterrupt:
@@ -18,6 +18,9 @@ PREVIEW_WIDTH=${PREVIEW_WIDTH:-640}
 PREVIEW_FPS=${PREVIEW_FPS:-7.5}
 # MJPEG quality (lower number = better quality)
 PREVIEW_Q=${PREVIEW_Q:-7}
+# Full-resolution snapshot stream served at /snapshot.jpg
+SNAPSHOT_FPS=${SNAPSHOT_FPS:-2}
+SNAPSHOT_QUALITY=${SNAPSHOT_QUALITY:-2}
 
 echo "=========================================="
 echo "Low-CPU Preview MJPEG"
@@ -43,6 +46,7 @@ fi
 SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 HTTP_PORT=${HTTP_PORT} CAMERA_DEVICE=${CAMERA_DEVICE} PREVIEW_FPS=${PREVIEW_FPS} \
 PREVIEW_WIDTH=${PREVIEW_WIDTH} CAPTURE_RES=${CAPTURE_RES} PREVIEW_Q=${PREVIEW_Q} \
+SNAPSHOT_FPS=${SNAPSHOT_FPS} SNAPSHOT_QUALITY=${SNAPSHOT_QUALITY} \
 python3 "${SCRIPT_DIR}/mjpeg_server.py" >/tmp/preview_mjpeg.log 2>&1 &
 PREVIEW_PID=$!
 echo $PREVIEW_PID > /tmp/preview_mjpeg.pid
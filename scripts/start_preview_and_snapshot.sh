@@ -2,6 +2,7 @@
 # Start both the low-CPU preview MJPEG server and the on-demand snapshot server
 # - Preview (HTTP MJPEG): http://localhost:${HTTP_PORT}/preview.mjpg
 # - Snapshot (single JPEG): http://localhost:${SNAPSHOT_PORT}/snapshot.jpg
+#   (latest full CAPTURE_RES frame from the preview's FFmpeg process)
 #
 # Usage:
 #   HTTP_PORT=8082 SNAPSHOT_PORT=8083 PREVIEW_FPS=7.5 ./scripts/start_preview_and_snapshot.sh
@@ -18,7 +19,8 @@ PREVIEW_FPS=${PREVIEW_FPS:-7.5}
 PREVIEW_WIDTH=${PREVIEW_WIDTH:-640}
 CAPTURE_RES=${CAPTURE_RES:-1280x720}
 CAMERA_DEVICE=${CAMERA_DEVICE:-0}
-SNAPSHOT_RESOLUTION=${SNAPSHOT_RESOLUTION:-1920x1080}
+SNAPSHOT_FPS=${SNAPSHOT_FPS:-2}
+SNAPSHOT_QUALITY=${SNAPSHOT_QUALITY:-2}
 
 echo "Starting preview (HTTP ${HTTP_PORT}) and snapshot (HTTP ${SNAPSHOT_PORT})..."
 
@@ -31,13 +33,14 @@ for P in ${HTTP_PORT} ${SNAPSHOT_PORT}; do
 done
 
 # Start snapshot server
-SNAPSHOT_PORT=${SNAPSHOT_PORT} SNAPSHOT_RESOLUTION=${SNAPSHOT_RESOLUTION} \
+SNAPSHOT_PORT=${SNAPSHOT_PORT} PREVIEW_HTTP_PORT=${HTTP_PORT} \
   python3 "${SCRIPT_DIR}/snapshot_server.py" >/tmp/snapshot_server.log 2>&1 &
 SNAP_PID=$!
 
 # Start preview server
 HTTP_PORT=${HTTP_PORT} PREVIEW_FPS=${PREVIEW_FPS} PREVIEW_WIDTH=${PREVIEW_WIDTH} \
   CAPTURE_RES=${CAPTURE_RES} CAMERA_DEVICE=${CAMERA_DEVICE} \
+  SNAPSHOT_FPS=${SNAPSHOT_FPS} SNAPSHOT_QUALITY=${SNAPSHOT_QUALITY} \
   bash "${SCRIPT_DIR}/preview_mjpeg_low.sh" >/tmp/preview_mjpeg.log 2>&1 &
 PREVIEW_PID=$!
 
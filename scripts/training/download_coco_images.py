@@ -6,9 +6,91 @@ import argparse
 import urllib.request
 import zipfile
 import tempfile
+import shutil
+import time
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+# Copy buffer for streaming the (multi-GB) zip to disk
+DOWNLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+
+
+class ProgressReader:
+    """Wraps a response and prints download progress at most once per interval."""
+    
+    def __init__(self, raw, total_size: int, interval: float = 1.0):
+        self.raw = raw
+        self.total_size = total_size
+        self.interval = interval
+        self.bytes_read = 0
+        self._last_report = 0.0
+        self._last_percent = -1
+    
+    def read(self, size: int = -1) -> bytes:
+        data = self.raw.read(size)
+        self.bytes_read += len(data)
+        now = time.monotonic()
+        if now - self._last_report >= self.interval:
+            self._last_report = now
+            self._report()
+        return data
+    
+    def _report(self) -> None:
+        if self.total_size > 0:
+            percent = int(self.bytes_read * 100 / self.total_size)
+            if percent != self._last_percent:
+                self._last_percent = percent
+                print(f"  Progress: {percent}%", end='\r', flush=True)
+        else:
+            print(f"  Downloaded: {self.bytes_read / 1e6:.0f} MB", end='\r', flush=True)
+
+
+def _extract_members(zip_path: str, members: list, output_dir: Path) -> None:
+    """Extract a subset of members using this worker's own ZipFile handle."""
+    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+        for info in members:
+            zip_ref.extract(info, output_dir)
+
+
+def extract_zip_parallel(zip_path: str, output_dir: Path, max_workers: int = None) -> None:
+    """
+    Extract a zip archive using a pool of threads.
+    
+    zlib releases the GIL while inflating, so members decompress and write in
+    parallel. Each worker opens its own ZipFile since a single handle is not
+    safe for concurrent reads.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    root = os.path.abspath(output_dir)
+    
+    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+        infos = zip_ref.infolist()
+    
+    files = []
+    dirs = set()
+    for info in infos:
+        target = os.path.abspath(os.path.join(root, info.filename))
+        if os.path.commonpath([root, target]) != root:
+            raise ValueError(f"Refusing to extract {info.filename!r} outside {output_dir}")
+        if info.is_dir():
+            dirs.add(target)
+        else:
+            dirs.add(os.path.dirname(target))
+            files.append(info)
+    
+    # Create directories up front so workers don't race on makedirs
+    for d in sorted(dirs):
+        os.makedirs(d, exist_ok=True)
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(_extract_members, zip_path, files[i::max_workers], output_dir)
+            for i in range(max_workers)
+        ]
+        for future in futures:
+            future.result()
+
 
 def download_coco_split(split: str, output_dir: Path) -> None:
     """Download and extract COCO images for the given split."""
@@ -25,18 +107,16 @@ def download_coco_split(split: str, output_dir: Path) -> None:
     
     # Download to temp file
     with tempfile.NamedTemporaryFile(delete=False, suffix=".zip") as tmp_zip:
-        def progress_hook(count, block_size, total_size):
-            percent = int(count * block_size * 100 / total_size)
-            if percent % 10 == 0:
-                print(f"  Progress: {percent}%", end='\r', flush=True)
-        
-        urllib.request.urlretrieve(zip_url, tmp_zip.name, reporthook=progress_hook)
+        with urllib.request.urlopen(zip_url) as response:
+            total_size = int(response.headers.get("Content-Length") or 0)
+            reader = ProgressReader(response, total_size)
+            shutil.copyfileobj(reader, tmp_zip, length=DOWNLOAD_CHUNK_SIZE)
+        tmp_zip.flush()
         print()  # New line after progress
         
         # Extract
         print(f"Extracting to {output_dir}...")
-        with zipfile.ZipFile(tmp_zip.name, 'r') as zip_ref:
-            zip_ref.extractall(output_dir)
+        extract_zip_parallel(tmp_zip.name, output_dir)
         
         # Cleanup
         os.unlink(tmp_zip.name)
@@ -23,6 +23,7 @@ This script does NOT change label class IDs. Our dataset prep step will remap
 the squirrel class to index 2 during merge.
 """
 import argparse
+import os
 from pathlib import Path
 import shutil
 from typing import List
@@ -42,19 +43,26 @@ def merge_split(rf_root: Path, split: str, out_images: Path, out_labels: Path) -
     if not img_dir.exists() or not lbl_dir.exists():
         return 0
 
+    # Single directory listing per side instead of a stat() per file
+    with os.scandir(lbl_dir) as it:
+        label_names = {e.name for e in it}
+    with os.scandir(out_images) as it:
+        existing = {e.name for e in it}
+
     count = 0
-    for img_path in sorted(img_dir.iterdir()):
-        if img_path.suffix.lower() not in IMG_EXTS:
+    with os.scandir(img_dir) as it:
+        entries = sorted(it, key=lambda e: e.name)
+    for entry in entries:
+        stem, ext = os.path.splitext(entry.name)
+        if ext.lower() not in IMG_EXTS:
             continue
-        stem = img_path.stem
-        dst_img = out_images / f"{split}_{img_path.name}"
+        dst_name = f"{split}_{entry.name}"
+        dst_img = out_images / dst_name
         dst_lbl = out_labels / f"{split}_{stem}.txt"
         src_lbl = lbl_dir / f"{stem}.txt"
-        ensure_dir(dst_img.parent)
-        ensure_dir(dst_lbl.parent)
-        if not dst_img.exists():
-            shutil.copy2(img_path, dst_img)
-        if src_lbl.exists():
+        if dst_name not in existing:
+            shutil.copy2(entry.path, dst_img)
+        if src_lbl.name in label_names:
             shutil.copy2(src_lbl, dst_lbl)
         else:
             # Create empty label for images without labels (should be rare)
@@ -17,25 +17,47 @@ Notes:
  - Squirrel dataset must be YOLO-format (images + labels) with a single class.
 """
 import argparse
+import errno
 import os
 import shutil
+import sys
 from pathlib import Path
 from typing import Dict, List, Tuple, Set
 import json
 import random
 import math
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
 import numpy as np
 from tqdm import tqdm
 
+try:
+    import fcntl
+except ImportError:  # non-POSIX
+    fcntl = None
+
 try:
     from pycocotools.coco import COCO
 except ImportError:
     COCO = None
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 COCO_DEFAULT_ROOT = os.path.expanduser("~/.cache/coco/2017")
 COCO_SPLITS = ("train2017", "val2017")
 
+# Image copies are I/O bound (the GIL is released during the syscalls)
+COPY_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+# linux/fs.h FICLONE: share extents with the source on CoW filesystems (btrfs, XFS)
+FICLONE = 0x40049409
+
+# One label line: class cx cy w h (normalized)
+YOLO_LINE_FMT = "%d %.6f %.6f %.6f %.6f"
+
 # Target classes and indices
 CLASS_TO_INDEX = {
     "person": 0,
@@ -88,18 +110,18 @@ def download_coco_annotations(coco_root: Path) -> None:
         return
     
     # Download annotations zip
+    import io
     import urllib.request
     import zipfile
-    import tempfile
     
     zip_url = "http://images.cocodataset.org/annotations/annotations_trainval2017.zip"
     print(f"Downloading COCO annotations from {zip_url}...")
     
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".zip") as tmp_zip:
-        urllib.request.urlretrieve(zip_url, tmp_zip.name)
-        with zipfile.ZipFile(tmp_zip.name, 'r') as zip_ref:
-            zip_ref.extractall(coco_root)
-        os.unlink(tmp_zip.name)
+    # ~250MB: keep it in memory and extract from there instead of a temp file round-trip
+    with urllib.request.urlopen(zip_url) as response:
+        buf = io.BytesIO(response.read())
+    with zipfile.ZipFile(buf, 'r') as zip_ref:
+        zip_ref.extractall(coco_root)
     
     print("✓ COCO annotations downloaded")
 
@@ -111,8 +133,8 @@ def download_coco_images(coco_root: Path, split: str) -> None:
         return  # Already exists
     
     import urllib.request
-    import zipfile
     import tempfile
+    from download_coco_images import extract_zip_parallel
     
     zip_url = f"http://images.cocodataset.org/zips/{split}.zip"
     print(f"Downloading COCO {split} images from {zip_url}...")
@@ -131,8 +153,7 @@ def download_coco_images(coco_root: Path, split: str) -> None:
             
             # Extract
             print(f"Extracting to {coco_root}...")
-            with zipfile.ZipFile(tmp_zip.name, 'r') as zip_ref:
-                zip_ref.extractall(coco_root)
+            extract_zip_parallel(tmp_zip.name, coco_root)
             
             print(f"✓ {split} images downloaded and extracted")
         except Exception as e:
@@ -178,19 +199,33 @@ def load_or_download_coco(coco_root: Path, split: str, auto_download_images: boo
     return images_dir, ann_file
 
 
+def load_coco(ann_file: Path) -> COCO:
+    """Build a COCO index, parsing the annotation JSON with orjson when available."""
+    raw = Path(ann_file).read_bytes()
+    coco = COCO()
+    coco.dataset = orjson.loads(raw) if orjson is not None else json.loads(raw)
+    coco.createIndex()
+    return coco
+
+
 def coco_category_id_map(coco: COCO) -> Dict[str, int]:
     cats = coco.loadCats(coco.getCatIds())
     name_to_id = {c["name"]: c["id"] for c in cats}
     return name_to_id
 
 
-def coco_to_yolo_bbox(bbox: List[float], img_w: int, img_h: int) -> Tuple[float, float, float, float]:
-    # COCO bbox: [x_min, y_min, width, height] in pixels
-    x, y, w, h = bbox
-    cx = x + w / 2.0
-    cy = y + h / 2.0
+def coco_to_yolo_bboxes(bboxes: np.ndarray, sizes: np.ndarray) -> np.ndarray:
+    """Convert an (N, 4) array of COCO boxes to normalized YOLO (cx, cy, w, h).
+
+    bboxes: [x_min, y_min, width, height] in pixels; sizes: (N, 2) image [width, height].
+    """
+    out = np.empty_like(bboxes, dtype=np.float64)
+    out[:, 0:2] = bboxes[:, 0:2] + bboxes[:, 2:4] / 2.0
+    out[:, 2:4] = bboxes[:, 2:4]
     # Normalize
-    return cx / img_w, cy / img_h, w / img_w, h / img_h
+    out[:, 0::2] /= sizes[:, 0:1]
+    out[:, 1::2] /= sizes[:, 1:2]
+    return out
 
 
 def collect_coco_images(
@@ -213,94 +248,182 @@ def collect_coco_images(
     person_img_ids = set(coco.getImgIds(catIds=[person_id]))
     bird_img_ids = set(coco.getImgIds(catIds=[bird_id]))
 
-    # Sample up to requested counts; shuffle to randomize
-    person_ids = list(person_img_ids)
-    bird_ids = list(bird_img_ids)
-    random.shuffle(person_ids)
-    random.shuffle(bird_ids)
-
-    person_ids = set(person_ids[:max_person_images])
-    bird_ids = set(bird_ids[:max_bird_images])
+    # Sample up to requested counts (O(k) selection, no full shuffle)
+    person_ids = set(random.sample(list(person_img_ids), min(max_person_images, len(person_img_ids))))
+    bird_ids = set(random.sample(list(bird_img_ids), min(max_bird_images, len(bird_img_ids))))
 
     selected_image_ids |= person_ids
     selected_image_ids |= bird_ids
 
-    # Build anns
-    for img_id in selected_image_ids:
-        anns = []
-        for cid, cname in [(person_id, "person"), (bird_id, "bird")]:
-            ann_ids = coco.getAnnIds(imgIds=[img_id], catIds=[cid], iscrowd=None)
-            anns.extend(coco.loadAnns(ann_ids))
-        if anns:
-            anns_by_img[img_id] = anns
+    # Build anns: one index query per class, grouped by image (person before bird)
+    for cid in (person_id, bird_id):
+        for ann in coco.loadAnns(coco.getAnnIds(catIds=[cid], iscrowd=None)):
+            if ann["image_id"] in selected_image_ids:
+                anns_by_img.setdefault(ann["image_id"], []).append(ann)
 
     return selected_image_ids, anns_by_img
 
 
-def copy_image(src_dir: Path, img_info: Dict, dst_dir: Path) -> Path:
+def _fast_copy(src: Path, dst: Path) -> None:
+    """Copy file contents, reflinking where the filesystem supports it (Linux).
+
+    Falls back to shutil.copyfile, which already uses sendfile() on Linux and
+    fcopyfile() on macOS. Metadata is not preserved; the images don't need it.
+    """
+    if fcntl is not None and sys.platform.startswith("linux"):
+        with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+            try:
+                fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+                return
+            except OSError as e:
+                if e.errno not in (errno.EOPNOTSUPP, errno.ENOTTY, errno.EXDEV, errno.EINVAL, errno.EBADF):
+                    raise
+    shutil.copyfile(src, dst)
+
+
+def place_file(src: Path, dst: Path, link: bool = False) -> None:
+    """Hardlink src to dst when asked (no data moved), copying if linking fails."""
+    if link:
+        try:
+            os.link(src, dst)
+            return
+        except OSError:
+            pass
+    _fast_copy(src, dst)
+
+
+def copy_image(src_dir: Path, img_info: Dict, dst_dir: Path, link: bool = False) -> Path:
     file_name = img_info["file_name"]
     src = src_dir / file_name
     dst = dst_dir / file_name
-    ensure_dir(dst.parent)
-    if not dst.exists():
-        shutil.copy2(src, dst)
+    place_file(src, dst, link)
     return dst
 
 
+def copy_images_parallel(
+    src_dir: Path,
+    infos: List[Dict],
+    dst_dirs: List[Path],
+    desc: str,
+    max_workers: int = COPY_WORKERS,
+    link: bool = False
+) -> List[Path]:
+    """Copy COCO images with a thread pool; returns destination paths in input order."""
+    # One listing per destination dir instead of a stat() per image
+    existing = {d: set(os.listdir(d)) for d in set(dst_dirs)}
+    jobs = [(info, d) for info, d in zip(infos, dst_dirs) if info["file_name"] not in existing[d]]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = executor.map(lambda job: copy_image(src_dir, *job, link=link), jobs)
+        for _ in tqdm(results, total=len(jobs), desc=desc):
+            pass
+    return [d / info["file_name"] for info, d in zip(infos, dst_dirs)]
+
+
 def write_yolo_labels(label_path: Path, lines: List[str]) -> None:
-    ensure_dir(label_path.parent)
-    with open(label_path, "w") as f:
-        for ln in lines:
-            f.write(ln.rstrip() + "\n")
+    # Build the whole file up front: one write() per label instead of one per line
+    label_path.write_text("".join(ln.rstrip() + "\n" for ln in lines))
+
+
+def write_labels_parallel(
+    labels: List[Tuple[Path, List[str]]],
+    desc: str,
+    max_workers: int = COPY_WORKERS
+) -> None:
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = executor.map(lambda item: write_yolo_labels(*item), labels)
+        for _ in tqdm(results, total=len(labels), desc=desc):
+            pass
+
+
+def select_coco_split(
+    split: str,
+    images_dir: Path,
+    ann_file: Path,
+    seed: int,
+    max_person_images: int,
+    max_bird_images: int
+) -> Tuple[List[Dict], Dict[int, List[Dict]], Dict[str, int]]:
+    """
+    Load one COCO split and sample its person/bird images.
+
+    Runs in a worker process (the COCO index doesn't pickle), so it returns plain
+    data: image records, annotations by image id, category ids by name.
+    """
+    # Per-split seed keeps the sample independent of which process runs it
+    random.seed(f"{seed}-{split}")
+    coco = load_coco(ann_file)
+    name_to_id = coco_category_id_map(coco)
+    if "person" not in name_to_id or "bird" not in name_to_id:
+        raise RuntimeError("COCO categories missing 'person' or 'bird'")
+
+    selected_image_ids, anns_by_img = collect_coco_images(
+        coco=coco,
+        images_dir=images_dir,
+        person_id=name_to_id["person"],
+        bird_id=name_to_id["bird"],
+        max_person_images=max_person_images,
+        max_bird_images=max_bird_images
+    )
+    # Order doesn't matter downstream (names are sorted before splitting); images
+    # without person/bird annotations still get an (empty) label from the caller
+    infos = coco.loadImgs(list(anns_by_img) + [i for i in selected_image_ids if i not in anns_by_img])
+    return infos, anns_by_img, name_to_id
 
 
 def generate_yolo_from_coco(
-    coco: COCO,
     images_dir: Path,
+    infos: List[Dict],
     out_images: Path,
     out_labels: Path,
-    selected_image_ids: Set[int],
     anns_by_img: Dict[int, List[Dict]],
-    name_to_id: Dict[str, int]
+    name_to_id: Dict[str, int],
+    split_of: Dict[str, str],
+    max_workers: int = COPY_WORKERS,
+    link: bool = False
 ) -> List[str]:
-    img_paths: List[str] = []
-    for img_id in tqdm(sorted(selected_image_ids), desc="Converting COCO -> YOLO"):
-        info = coco.loadImgs([img_id])[0]
-        dst_img = copy_image(images_dir, info, out_images)
-        img_paths.append(dst_img.name)
-
-        img_w = info["width"]
-        img_h = info["height"]
-        lines: List[str] = []
-        for ann in anns_by_img.get(img_id, []):
-            cid = ann["category_id"]
-            cname = None
-            if cid == name_to_id.get("person"):
-                cname = "person"
-            elif cid == name_to_id.get("bird"):
-                cname = "bird"
-            if not cname:
-                continue
-            yolo_cls = CLASS_TO_INDEX[cname]
-            cx, cy, w, h = coco_to_yolo_bbox(ann["bbox"], img_w, img_h)
-            # guard small/invalid boxes
-            if w <= 0 or h <= 0:
+    """Copy images and write labels straight into out_images/<split>, out_labels/<split>."""
+    splits = [split_of[info["file_name"]] for info in infos]
+    dst_imgs = copy_images_parallel(images_dir, infos, [out_images / split for split in splits],
+                                    desc="Copying COCO images", max_workers=max_workers, link=link)
+    img_paths: List[str] = [dst_img.name for dst_img in dst_imgs]
+
+    # Flatten every kept annotation so the bbox math runs as a few array ops
+    cls_to_yolo = {name_to_id.get(cname): CLASS_TO_INDEX[cname] for cname in ("bird", "person")}
+    ann_img: List[int] = []
+    ann_cls: List[int] = []
+    ann_boxes: List[List[float]] = []
+    ann_sizes: List[Tuple[int, int]] = []
+    for i, info in enumerate(infos):
+        for ann in anns_by_img.get(info["id"], ()):
+            yolo_cls = cls_to_yolo.get(ann["category_id"])
+            if yolo_cls is None:
                 continue
-            lines.append(f"{yolo_cls} {cx:.6f} {cy:.6f} {w:.6f} {h:.6f}")
-
-        # Write label file (even if empty, to mark negatives)
-        label_path = out_labels / (Path(info["file_name"]).stem + ".txt")
-        write_yolo_labels(label_path, lines)
+            ann_img.append(i)
+            ann_cls.append(yolo_cls)
+            ann_boxes.append(ann["bbox"])
+            ann_sizes.append((info["width"], info["height"]))
+
+    lines_by_img: List[List[str]] = [[] for _ in infos]
+    if ann_boxes:
+        yolo = coco_to_yolo_bboxes(np.asarray(ann_boxes, dtype=np.float64),
+                                   np.asarray(ann_sizes, dtype=np.float64))
+        # guard small/invalid boxes
+        keep = (yolo[:, 2] > 0) & (yolo[:, 3] > 0)
+        for i, yolo_cls, box in zip(np.asarray(ann_img)[keep].tolist(),
+                                    np.asarray(ann_cls)[keep].tolist(),
+                                    yolo[keep].tolist()):
+            lines_by_img[i].append(YOLO_LINE_FMT % (yolo_cls, *box))
+
+    # Write label files (even if empty, to mark negatives)
+    labels = [(out_labels / split / (Path(info["file_name"]).stem + ".txt"), lines)
+              for info, split, lines in zip(infos, splits, lines_by_img)]
+    write_labels_parallel(labels, desc="Writing YOLO labels", max_workers=max_workers)
     return img_paths
 
 
-def merge_squirrel_yolo(
-    squirrel_yolo_dir: Path,
-    out_images: Path,
-    out_labels: Path
-) -> List[str]:
+def list_squirrel_images(squirrel_yolo_dir: Path) -> List[Path]:
     """
-    Copy YOLO images/labels from squirrel dataset and remap all class ids to 2.
+    List the images of a YOLO-format squirrel dataset.
     Expect structure:
       squirrel_yolo_dir/
         images/*.jpg|png
@@ -311,18 +434,50 @@ def merge_squirrel_yolo(
     if not img_dir.exists() or not lbl_dir.exists():
         raise RuntimeError(f"Squirrel YOLO dataset missing images/labels in {squirrel_yolo_dir}")
 
-    img_paths: List[str] = []
-    for img_path in tqdm(sorted(img_dir.glob("*")), desc="Merging squirrel dataset"):
-        if img_path.suffix.lower() not in (".jpg", ".jpeg", ".png"):
-            continue
-        dst_img = out_images / img_path.name
-        ensure_dir(dst_img.parent)
-        if not dst_img.exists():
-            shutil.copy2(img_path, dst_img)
+    # One getdents pass per directory; entries carry their type, so no per-file stat
+    with os.scandir(img_dir) as it:
+        return sorted(
+            (Path(e.path) for e in it
+             if not e.name.startswith(".") and e.is_file()
+             and os.path.splitext(e.name)[1].lower() in (".jpg", ".jpeg", ".png")),
+            key=lambda p: p.name
+        )
+
+
+def merge_squirrel_yolo(
+    squirrel_yolo_dir: Path,
+    img_srcs: List[Path],
+    out_images: Path,
+    out_labels: Path,
+    split_of: Dict[str, str],
+    max_workers: int = COPY_WORKERS,
+    link: bool = False
+) -> List[str]:
+    """
+    Copy YOLO images/labels from squirrel dataset into their splits and remap all class ids to 2.
+    img_srcs comes from list_squirrel_images().
+    """
+    lbl_dir = squirrel_yolo_dir / "labels"
+    with os.scandir(lbl_dir) as it:
+        label_names = {e.name for e in it}
+    existing = {split: set(os.listdir(out_images / split)) for split in set(split_of.values())}
+
+    def _copy_one(img_path: Path) -> str:
+        split = split_of[img_path.name]
+        if img_path.name not in existing[split]:
+            place_file(img_path, out_images / split / img_path.name, link)
+        return img_path.name
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        img_paths: List[str] = list(tqdm(
+            executor.map(_copy_one, img_srcs), total=len(img_srcs), desc="Merging squirrel images"
+        ))
+
+    def _merge_label(img_path: Path) -> None:
         # Label file
         lbl_path = lbl_dir / (img_path.stem + ".txt")
         lines: List[str] = []
-        if lbl_path.exists():
+        if lbl_path.name in label_names:
             with open(lbl_path, "r") as f:
                 for ln in f:
                     ln = ln.strip()
@@ -333,8 +488,11 @@ def merge_squirrel_yolo(
                     parts[0] = str(CLASS_TO_INDEX["squirrel"])
                     lines.append(" ".join(parts))
         # Write merged label
-        write_yolo_labels(out_labels / (img_path.stem + ".txt"), lines)
-        img_paths.append(dst_img.name)
+        write_yolo_labels(out_labels / split_of[img_path.name] / (img_path.stem + ".txt"), lines)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for _ in tqdm(executor.map(_merge_label, img_srcs), total=len(img_srcs), desc="Merging squirrel labels"):
+            pass
     return img_paths
 
 
@@ -358,31 +516,6 @@ def stratified_split(
     return train, val, test
 
 
-def move_split_sets(
-    all_names: Set[str],
-    train_set: Set[str],
-    val_set: Set[str],
-    test_set: Set[str],
-    tmp_images: Path,
-    tmp_labels: Path,
-    out_root: Path
-) -> None:
-    for split, names in (("train", train_set), ("val", val_set), ("test", test_set)):
-        img_dst = out_root / "images" / split
-        lbl_dst = out_root / "labels" / split
-        ensure_dir(img_dst)
-        ensure_dir(lbl_dst)
-        for name in names:
-            src_img = tmp_images / name
-            src_lbl = tmp_labels / (Path(name).stem + ".txt")
-            shutil.move(str(src_img), str(img_dst / name))
-            shutil.move(str(src_lbl), str(lbl_dst / (Path(name).stem + ".txt")))
-    # Cleanup any remaining temp files
-    for p in [tmp_images, tmp_labels]:
-        if p.exists():
-            shutil.rmtree(p, ignore_errors=True)
-
-
 def main():
     parser = argparse.ArgumentParser(description="Prepare 3-class YOLO dataset (person, bird, squirrel)")
     parser.add_argument("--out-root", type=str, default="data/datasets/person_bird_squirrel",
@@ -398,16 +531,20 @@ def main():
     parser.add_argument("--squirrel-yolo-dir", type=str, required=True,
                         help="Path to YOLO-format squirrel dataset (images/ + labels/)")
     parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--copy-workers", type=int, default=COPY_WORKERS,
+                        help="Concurrent image copies in flight (raise on NVMe/network storage)")
+    parser.add_argument("--link", action="store_true",
+                        help="Hardlink source images into the dataset instead of copying "
+                             "(shares inodes: editing either file changes both)")
     args = parser.parse_args()
 
     random.seed(args.seed)
     np.random.seed(args.seed)
 
     out_root = Path(args.out_root)
-    tmp_images = out_root / "_tmp_images"
-    tmp_labels = out_root / "_tmp_labels"
-    ensure_dir(tmp_images)
-    ensure_dir(tmp_labels)
+    out_images = out_root / "images"
+    out_labels = out_root / "labels"
+    ensure_dir(out_root)
 
     # Aggregate selected images across provided splits
     all_names: Set[str] = set()
@@ -416,56 +553,62 @@ def main():
     if COCO is None:
         raise RuntimeError("pycocotools is required. Install from scripts/training/requirements.txt")
 
+    # Select everything first so each file can be written once, straight into its split.
+    # Downloads run here, sequentially (both splits share the annotations zip); the
+    # JSON parse + index build for each split then runs in its own process.
+    coco_splits = [s.strip() for s in args.coco_splits.split(",") if s.strip()]
+    coco_paths = [load_or_download_coco(Path(args.coco_root), split) for split in coco_splits]
+    with ProcessPoolExecutor(max_workers=max(1, len(coco_splits))) as executor:
+        futures = [
+            executor.submit(select_coco_split, split, images_dir, ann_file, args.seed,
+                            args.max_person_images, args.max_bird_images)
+            for split, (images_dir, ann_file) in zip(coco_splits, coco_paths)
+        ]
+        selections = [future.result() for future in futures]
+
+    coco_jobs = []
     name_to_id_global: Dict[str, int] = {}
-    for split in [s.strip() for s in args.coco_splits.split(",") if s.strip()]:
-        images_dir, ann_file = load_or_download_coco(Path(args.coco_root), split)
-        coco = COCO(str(ann_file))
-        name_to_id = coco_category_id_map(coco)
+    for (images_dir, _), (infos, anns_by_img, name_to_id) in zip(coco_paths, selections):
         # update global mapping
         name_to_id_global.update(name_to_id)
-        if "person" not in name_to_id or "bird" not in name_to_id:
-            raise RuntimeError("COCO categories missing 'person' or 'bird'")
+        all_names.update(info["file_name"] for info in infos)
+        coco_jobs.append((images_dir, infos, anns_by_img, name_to_id))
 
-        selected_image_ids, anns_by_img = collect_coco_images(
-            coco=coco,
-            images_dir=images_dir,
-            person_id=name_to_id["person"],
-            bird_id=name_to_id["bird"],
-            max_person_images=args.max_person_images,
-            max_bird_images=args.max_bird_images
-        )
+    squirrel_yolo_dir = Path(args.squirrel_yolo_dir)
+    squirrel_imgs = list_squirrel_images(squirrel_yolo_dir)
+    all_names.update(p.name for p in squirrel_imgs)
 
-        img_names = generate_yolo_from_coco(
-            coco=coco,
+    # Split
+    train_set, val_set, test_set = stratified_split(sorted(all_names), cls_counts={}, train_ratio=0.8, val_ratio=0.1)
+    # Every output directory is created here, once; the per-file helpers assume it exists
+    split_of: Dict[str, str] = {}
+    for split, names in (("train", train_set), ("val", val_set), ("test", test_set)):
+        ensure_dir(out_images / split)
+        ensure_dir(out_labels / split)
+        split_of.update(dict.fromkeys(names, split))
+
+    for images_dir, infos, anns_by_img, name_to_id in coco_jobs:
+        generate_yolo_from_coco(
             images_dir=images_dir,
-            out_images=tmp_images,
-            out_labels=tmp_labels,
-            selected_image_ids=selected_image_ids,
+            infos=infos,
+            out_images=out_images,
+            out_labels=out_labels,
             anns_by_img=anns_by_img,
-            name_to_id=name_to_id
+            name_to_id=name_to_id,
+            split_of=split_of,
+            max_workers=args.copy_workers,
+            link=args.link
         )
-        all_names.update(img_names)
 
     # Merge squirrel YOLO dataset (class id remapped to 2)
-    squirrel_names = merge_squirrel_yolo(
-        squirrel_yolo_dir=Path(args.squirrel_yolo_dir),
-        out_images=tmp_images,
-        out_labels=tmp_labels
-    )
-    all_names.update(squirrel_names)
-
-    # Split
-    train_set, val_set, test_set = stratified_split(sorted(all_names), cls_counts={}, train_ratio=0.8, val_ratio=0.1)
-
-    # Move to final structure
-    move_split_sets(
-        all_names=set(all_names),
-        train_set=train_set,
-        val_set=val_set,
-        test_set=test_set,
-        tmp_images=tmp_images,
-        tmp_labels=tmp_labels,
-        out_root=out_root
+    merge_squirrel_yolo(
+        squirrel_yolo_dir=squirrel_yolo_dir,
+        img_srcs=squirrel_imgs,
+        out_images=out_images,
+        out_labels=out_labels,
+        split_of=split_of,
+        max_workers=args.copy_workers,
+        link=args.link
     )
 
     # Write data.yaml
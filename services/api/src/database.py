@@ -2,33 +2,307 @@
 Database operations for API service.
 """
 import psycopg2
-import psycopg2.extras
 from psycopg2 import pool
+from psycopg2.errors import QueryCanceled
+from psycopg2.extras import NamedTupleCursor, register_default_json, register_default_jsonb
+import functools
 import logging
-from typing import List, Dict, Any, Optional, Tuple
-from datetime import datetime, timedelta, timezone
+import threading
+import time
+from contextlib import contextmanager
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+from datetime import datetime, timezone
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    # Decode bounding_boxes/metadata/weather (jsonb) and built objects (json) with orjson, on every connection
+    register_default_jsonb(loads=orjson.loads, globally=True)
+    register_default_json(loads=orjson.loads, globally=True)
 
 logger = logging.getLogger(__name__)
 
+# Never take more than this share of the server's max_connections
+POOL_MAX_CONNECTIONS_SHARE = 0.25
+
+# Columns the API exposes (DetectionBase); selected by name rather than *
+DETECTION_COLUMNS = (
+    'id', 'timestamp', 'image_path', 'is_bird', 'is_human', 'is_squirrel',
+    'category', 'confidence', 'species', 'bounding_boxes', 'motion_score',
+    'metadata', 'detected_at', 'created_at', 'weather', 'bird_name',
+    'bird_backstory', 'bbox_image_path', 'video_path',
+)
+# Naive TIMESTAMP columns hold UTC; reads convert them to timestamptz so
+# psycopg2 hands back aware datetimes (order and filter on the raw d.column)
+DETECTION_TIMESTAMP_FIELDS = ('timestamp', 'detected_at', 'created_at')
+DETECTION_SELECT = ", ".join(
+    f"d.{column} AT TIME ZONE 'UTC' AS {column}" if column in DETECTION_TIMESTAMP_FIELDS else f"d.{column}"
+    for column in DETECTION_COLUMNS
+)
+ANNOTATION_SELECT = (
+    "a.id, a.detection_id, a.is_correct, a.correct_class, a.incorrect_class, a.notes, "
+    "a.created_at AT TIME ZONE 'UTC' AS created_at, a.updated_at AT TIME ZONE 'UTC' AS updated_at"
+)
+
+# The joined annotation (alias a) as JSON, or NULL when there is none
+ANNOTATION_JSON = """CASE WHEN a.id IS NULL THEN NULL ELSE json_build_object(
+    'id', a.id,
+    'detection_id', a.detection_id,
+    'is_correct', a.is_correct,
+    'correct_class', a.correct_class,
+    'incorrect_class', a.incorrect_class,
+    'notes', a.notes,
+    'created_at', a.created_at AT TIME ZONE 'UTC',
+    'updated_at', a.updated_at AT TIME ZONE 'UTC'
+) END"""
+
+# Fixed hot-path queries, prepared on first use per pooled connection (parse + plan once)
+PREPARED_STATEMENTS = {
+    'detection_by_id': f"""
+        SELECT {DETECTION_SELECT}, {ANNOTATION_JSON} AS annotation
+        FROM detections d
+        LEFT JOIN detection_annotations a ON d.id = a.detection_id
+        WHERE d.id = $1
+    """,
+    'latest_detection': f"""
+        SELECT {DETECTION_SELECT} FROM detections d
+        ORDER BY d.timestamp DESC
+        LIMIT 1
+    """,
+    'delete_detection': "DELETE FROM detections WHERE id = $1 RETURNING image_path",
+    # Array parameters keep one statement text whatever the number of ids
+    'delete_detections': "DELETE FROM detections WHERE id = ANY($1) RETURNING image_path",
+    'delete_annotation': "DELETE FROM detection_annotations WHERE detection_id = $1",
+}
+
+
+# Dashboard aggregates tolerate a few seconds of staleness
+READ_CACHE_TTL = 5.0
+
+# Distinct filters whose detection count may be cached at once
+DETECTION_COUNT_CACHE_SIZE = 256
+
+# Default upper bound for user-facing reads (config 'read_statement_timeout'), so
+# a stalled query can't pin a pooled connection. A read that hits it raises
+# QueryCanceled instead of returning an empty result.
+DEFAULT_READ_STATEMENT_TIMEOUT = '30s'
+
+# Any query that succeeded this recently already proves the database is up
+HEALTH_CHECK_INTERVAL = 5.0
+
+
+def ttl_cached(ttl: float):
+    """
+    Cache a no-argument Database method's result for ttl seconds (failures
+    aren't cached). On a miss one thread refreshes while concurrent callers
+    wait for its result instead of all querying at once.
+    """
+    def decorator(func):
+        lock = threading.Lock()
+        
+        @functools.wraps(func)
+        def wrapper(self):
+            entry = self._cache.get(func.__name__)
+            if entry is not None and entry[0] > time.monotonic():
+                return entry[1]
+            with lock:
+                now = time.monotonic()
+                entry = self._cache.get(func.__name__)
+                if entry is not None and entry[0] > now:
+                    return entry[1]
+                value = func(self)
+                if value:
+                    self._cache[func.__name__] = (now + ttl, value)
+                return value
+        return wrapper
+    return decorator
+
+
+# Position of the optional annotation after a tuple row of DETECTION_SELECT
+DETECTION_WIDTH = len(DETECTION_COLUMNS)
+
+
+def _hydrate_detection(row: tuple) -> Dict[str, Any]:
+    """Shape a tuple row of DETECTION_SELECT (plus any ANNOTATION_JSON column) for the API."""
+    detection = dict(zip(DETECTION_COLUMNS, row))
+    if len(row) > DETECTION_WIDTH and row[DETECTION_WIDTH] is not None:
+        # Already shaped by Postgres, timestamps included
+        detection['annotation'] = row[DETECTION_WIDTH]
+    return detection
+
+
+# Exports stream through a server-side cursor, fetching this many rows per round trip
+EXPORT_ITERSIZE = 200
+# Most rows one export may return, and exports allowed to run at once. Exports
+# use their own connections, so they never hold pool slots the list needs.
+EXPORT_MAX_ROWS = 50000
+EXPORT_MAX_CONCURRENT = 2
+
+
+def _detection_columns(fields: Optional[List[str]] = None) -> Tuple[str, ...]:
+    """
+    Canonical column tuple for a fields request: all columns by default,
+    unknown names dropped, id and timestamp always kept for the keyset cursor.
+    """
+    if not fields:
+        return DETECTION_COLUMNS
+    wanted = set(fields) | {'id', 'timestamp'}
+    return tuple(column for column in DETECTION_COLUMNS if column in wanted)
+
+
+def _detection_json(columns: Tuple[str, ...]) -> str:
+    """SQL expression building one detection (alias d, joined annotation a) as JSON."""
+    pairs = []
+    for column in columns:
+        if column in DETECTION_TIMESTAMP_FIELDS:
+            # Naive UTC goes out as timestamptz so the JSON carries an offset
+            pairs.append(f"'{column}', d.{column} AT TIME ZONE 'UTC'")
+        else:
+            pairs.append(f"'{column}', d.{column}")
+    return f"json_build_object({', '.join(pairs)}, 'annotation', {ANNOTATION_JSON})"
+
+
+# Query text depends only on the filter mask, keyset mode and column set, so
+# each shape is formatted once and Postgres always sees the same text for it
+@functools.lru_cache(maxsize=256)
+def _detections_page_sql(mask: int, keyset: bool, columns: Tuple[str, ...]) -> str:
+    """
+    One page of detections aggregated into a JSON array, plus the window
+    total (NULL in keyset mode), the row count and the last row's cursor.
+    """
+    where_clause = DETECTION_WHERE_CLAUSES[mask]
+    if keyset:
+        where_clause += " AND (d.timestamp, d.id) < (%s, %s)"
+    total_column = "NULL" if keyset else "COUNT(*) OVER ()"
+    return f"""
+        SELECT COALESCE(json_agg(p.item ORDER BY p.timestamp DESC, p.id DESC), '[]')::text AS items,
+               MAX(p.total_count) AS total_count,
+               COUNT(*) AS row_count,
+               (array_agg(p.timestamp ORDER BY p.timestamp, p.id))[1] AT TIME ZONE 'UTC' AS last_timestamp,
+               (array_agg(p.id ORDER BY p.timestamp, p.id))[1] AS last_id
+        FROM (
+            SELECT d.timestamp, d.id,
+                   {total_column} AS total_count,
+                   {_detection_json(columns)} AS item
+            FROM detections d
+            LEFT JOIN detection_annotations a ON d.id = a.detection_id
+            WHERE {where_clause}
+            ORDER BY d.timestamp DESC, d.id DESC
+            LIMIT %s OFFSET %s
+        ) p
+    """
+
+
+@functools.lru_cache(maxsize=64)
+def _detections_export_sql(mask: int, columns: Tuple[str, ...]) -> str:
+    """Every matching detection as one JSON text per row, newest first."""
+    return f"""
+        SELECT {_detection_json(columns)}::text
+        FROM detections d
+        LEFT JOIN detection_annotations a ON d.id = a.detection_id
+        WHERE {DETECTION_WHERE_CLAUSES[mask]}
+        ORDER BY d.timestamp DESC, d.id DESC
+        LIMIT %s
+    """
+
+
+def _hydrate_annotation(row) -> Dict[str, Any]:
+    """Shape a NamedTupleCursor row of ANNOTATION_SELECT for the API."""
+    return {
+        'id': row.id,
+        'detection_id': row.detection_id,
+        'is_correct': row.is_correct,
+        'correct_class': row.correct_class,
+        'incorrect_class': row.incorrect_class,
+        'notes': row.notes,
+        'created_at': row.created_at,
+        'updated_at': row.updated_at,
+    }
+
+
+# Optional detection filters in mask bit order; all 32 WHERE shapes are built once
+DETECTION_FILTER_CONDITIONS = (
+    "is_bird = %s",
+    "is_human = %s",
+    "category = %s",
+    "timestamp >= %s",
+    "timestamp <= %s",
+)
+DETECTION_WHERE_CLAUSES = tuple(
+    " AND ".join(
+        condition for bit, condition in enumerate(DETECTION_FILTER_CONDITIONS) if mask >> bit & 1
+    ) or "1=1"
+    for mask in range(1 << len(DETECTION_FILTER_CONDITIONS))
+)
+
+
+def _detection_filter(is_bird, is_human, category, start_date, end_date) -> Tuple[int, str, List[Any]]:
+    """Return (mask, where_clause, params) for the given detection filters; mask 0 means none."""
+    values = (is_bird, is_human, category or None, start_date or None, end_date or None)
+    mask = 0
+    params = []
+    for bit, value in enumerate(values):
+        if value is not None:
+            mask |= 1 << bit
+            params.append(value)
+    return mask, DETECTION_WHERE_CLAUSES[mask], params
+
+
+class PreparedConnection(psycopg2.extensions.connection):
+    """Connection that remembers which PREPARED_STATEMENTS exist in its session."""
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared = set()
+
+
 class Database:
     def __init__(self, config):
         self.config = config
         self.connection_pool = None
+        # Checkouts wait on this (sized to the pool) instead of getconn raising PoolError
+        self.pool_max = 0
+        self._pool_slots = None
+        self._export_slots = threading.BoundedSemaphore(EXPORT_MAX_CONCURRENT)
+        self.read_statement_timeout = config.get(
+            'read_statement_timeout', DEFAULT_READ_STATEMENT_TIMEOUT
+        )
+        self._cache: Dict[str, Tuple[float, Any]] = {}
+        # Last data_version seen; a change invalidates _cache
+        self._data_version = None
+        # Monotonic time of the last successful unit of work (any query counts)
+        self._last_success = 0.0
+        # Dedicated connection for health probes, so they never take a pool slot;
+        # _health_lock serializes its use, _health_ok is the last probe's outcome
+        self._health_conn = None
+        self._health_lock = threading.Lock()
+        self._health_ok = False
     
     def connect(self):
         """Create connection pool to PostgreSQL."""
         try:
-            self.connection_pool = psycopg2.pool.SimpleConnectionPool(
-                1,  # min connections
-                10,  # max connections
+            pool_min = self.config.get('pg_pool_min', 2)
+            pool_max = self._clamp_pool_max(self.config.get('pg_pool_max', 20))
+            pool_min = min(pool_min, pool_max)
+            # ThreadedConnectionPool: request handlers run on worker threads
+            self.pool_max = pool_max
+            self._pool_slots = threading.BoundedSemaphore(pool_max)
+            self.connection_pool = psycopg2.pool.ThreadedConnectionPool(
+                pool_min,
+                pool_max,
                 host=self.config['postgres_host'],
                 database=self.config['postgres_db'],
                 user=self.config['postgres_user'],
                 password=self.config['postgres_password'],
-                port=self.config.get('postgres_port', 5432)
+                port=self.config.get('postgres_port', 5432),
+                connection_factory=PreparedConnection
             )
             if self.connection_pool:
-                logger.info("✓ Database connection pool created")
+                logger.info(f"✓ Database connection pool created (min={pool_min}, max={pool_max})")
+                self._check_detection_columns()
                 return True
             else:
                 logger.error("Failed to create database connection pool")
@@ -37,32 +311,158 @@ class Database:
             logger.error(f"Error creating connection pool: {e}")
             return False
     
+    def _direct_connection(self):
+        """Open a standalone (non-pooled) connection."""
+        return psycopg2.connect(
+            host=self.config['postgres_host'],
+            database=self.config['postgres_db'],
+            user=self.config['postgres_user'],
+            password=self.config['postgres_password'],
+            port=self.config.get('postgres_port', 5432)
+        )
+    
+    def _clamp_pool_max(self, pool_max: int) -> int:
+        """
+        Cap the pool at a share of the server's max_connections (best effort),
+        split between the API's worker processes.
+        """
+        try:
+            conn = self._direct_connection()
+        except psycopg2.Error as e:
+            logger.warning(f"Could not read max_connections, using pool max {pool_max}: {e}")
+            return pool_max
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SHOW max_connections")
+                max_connections = int(cur.fetchone()[0])
+        finally:
+            conn.close()
+        workers = max(1, self.config.get('web_concurrency', 1))
+        limit = max(1, int(max_connections * POOL_MAX_CONNECTIONS_SHARE / workers))
+        if pool_max > limit:
+            logger.info(f"Clamping pool max {pool_max} to {limit} (max_connections={max_connections})")
+            return limit
+        return pool_max
+    
     def get_connection(self):
-        """Get a connection from the pool."""
+        """Get a connection from the pool, waiting while all are checked out."""
         if self.connection_pool:
-            return self.connection_pool.getconn()
+            self._pool_slots.acquire()
+            try:
+                conn = self.connection_pool.getconn()
+            except BaseException:
+                self._pool_slots.release()
+                raise
+            return conn
         return None
     
-    def return_connection(self, conn):
-        """Return a connection to the pool."""
+    def _check_detection_columns(self):
+        """Log schema drift between the detections table and DETECTION_COLUMNS."""
+        try:
+            with self._conn() as conn, conn.cursor() as cur:
+                cur.execute("""
+                    SELECT column_name FROM information_schema.columns
+                    WHERE table_schema = current_schema() AND table_name = 'detections'
+                """)
+                existing = {row[0] for row in cur}
+        except psycopg2.Error as e:
+            logger.warning(f"Could not check detections columns: {e}")
+            return
+        if not existing:
+            # The storage service creates the schema; it may not have run yet
+            logger.warning("detections table not found; detection queries will fail until it exists")
+            return
+        missing = [column for column in DETECTION_COLUMNS if column not in existing]
+        if missing:
+            logger.error(f"detections table is missing columns the API selects: {', '.join(missing)}")
+    
+    @staticmethod
+    def _execute_prepared(cur, name: str, args: tuple = ()):
+        """EXECUTE a PREPARED_STATEMENTS query, preparing it first if this connection hasn't."""
+        conn = cur.connection
+        if name not in conn.prepared:
+            # Session-level: survives a rollback of the surrounding transaction
+            cur.execute(f"PREPARE {name} AS {PREPARED_STATEMENTS[name]}")
+            conn.prepared.add(name)
+        if args:
+            cur.execute(f"EXECUTE {name}({', '.join(['%s'] * len(args))})", args)
+        else:
+            cur.execute(f"EXECUTE {name}")
+    
+    def invalidate_cache(self):
+        """Drop cached reads after this process changes detections."""
+        self._cache.clear()
+    
+    def return_connection(self, conn, close: bool = False):
+        """Return a connection to the pool (closing it if close is set)."""
         if self.connection_pool:
-            self.connection_pool.putconn(conn)
+            try:
+                self.connection_pool.putconn(conn, close=close)
+            finally:
+                self._pool_slots.release()
     
-    def check_health(self):
-        """Check database health."""
+    @contextmanager
+    def _conn(self, statement_timeout: Optional[str] = None):
+        """
+        Check out a pooled connection for one unit of work.
+        
+        The connection always goes back to the pool. If an error escapes the
+        block it is rolled back, and discarded instead when even the rollback
+        fails (dead server, broken socket). statement_timeout is applied with
+        SET LOCAL, so it only lasts for this transaction.
+        """
         conn = self.get_connection()
-        if not conn:
-            return False
+        if conn is None:
+            raise psycopg2.OperationalError("Database connection pool is not available")
+        discard = False
         try:
-            with conn.cursor() as cur:
+            if statement_timeout:
+                with conn.cursor() as cur:
+                    cur.execute("SET LOCAL statement_timeout = %s", (statement_timeout,))
+            yield conn
+            self._last_success = time.monotonic()
+        except BaseException:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                discard = True
+            raise
+        finally:
+            self.return_connection(conn, close=discard or bool(conn.closed))
+    
+    def check_health(self) -> bool:
+        """
+        Check database health.
+        
+        If any query succeeded within HEALTH_CHECK_INTERVAL seconds the
+        database is up and no round trip is made. Otherwise SELECT 1 runs on
+        a dedicated connection (reopened when broken), so probes never take a
+        pool slot from requests. While one thread is probing, concurrent
+        callers get the previous probe's outcome instead of queueing.
+        """
+        if time.monotonic() - self._last_success < HEALTH_CHECK_INTERVAL:
+            return True
+        if not self._health_lock.acquire(blocking=False):
+            return self._health_ok
+        try:
+            if self._health_conn is None or self._health_conn.closed:
+                self._health_conn = self._direct_connection()
+                self._health_conn.autocommit = True
+            with self._health_conn.cursor() as cur:
                 cur.execute("SELECT 1")
-                return True
-        except:
-            return False
+            self._last_success = time.monotonic()
+            self._health_ok = True
+        except psycopg2.Error as e:
+            logger.warning(f"Database health check failed: {e}")
+            if self._health_conn is not None:
+                self._health_conn.close()
+                self._health_conn = None
+            self._health_ok = False
         finally:
-            self.return_connection(conn)
+            self._health_lock.release()
+        return self._health_ok
     
-    def get_detections(
+    def get_detections_json(
         self,
         page: int = 1,
         page_size: int = 20,
@@ -70,361 +470,277 @@ class Database:
         is_human: Optional[bool] = None,
         category: Optional[str] = None,
         start_date: Optional[datetime] = None,
-        end_date: Optional[datetime] = None
-    ) -> tuple[List[Dict[str, Any]], int]:
-        """Get detections with pagination and filters."""
-        conn = self.get_connection()
-        if not conn:
-            return [], 0
+        end_date: Optional[datetime] = None,
+        before_timestamp: Optional[datetime] = None,
+        before_id: Optional[int] = None,
+        fields: Optional[List[str]] = None
+    ) -> Tuple[str, int, Optional[Tuple[datetime, int]]]:
+        """
+        Get a page of detections with filters, serialized to JSON by Postgres.
+        
+        Returns (items, total, last): items is the JSON array text in the
+        DetectionResponse shape, last is the (timestamp, id) keyset cursor of
+        the final row when the page is full, else None.
         
+        Passing before_timestamp/before_id (the last row of the previous page)
+        switches from OFFSET to keyset pagination, which stays O(page_size) at
+        any depth; page is then ignored. fields limits the detection columns
+        serialized (unknown names are ignored), e.g. to drop heavy JSONB
+        columns a list view doesn't show.
+        """
         try:
-            with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
-                # Build WHERE clause
-                conditions = []
-                params = []
-                
-                if is_bird is not None:
-                    conditions.append("is_bird = %s")
-                    params.append(is_bird)
-                
-                if is_human is not None:
-                    conditions.append("is_human = %s")
-                    params.append(is_human)
-                
-                if category:
-                    conditions.append("category = %s")
-                    params.append(category)
-                
-                if start_date:
-                    conditions.append("timestamp >= %s")
-                    params.append(start_date)
-                
-                if end_date:
-                    conditions.append("timestamp <= %s")
-                    params.append(end_date)
-                
-                where_clause = " AND ".join(conditions) if conditions else "1=1"
-                
-                # Get total count
-                count_query = f"SELECT COUNT(*) FROM detections WHERE {where_clause}"
-                cur.execute(count_query, params)
-                total = cur.fetchone()['count']
-                
-                # Get paginated results with annotation info
-                offset = (page - 1) * page_size
-                query = f"""
-                    SELECT d.*, 
-                           a.id as annotation_id,
-                           a.is_correct as annotation_is_correct,
-                           a.correct_class as annotation_correct_class,
-                           a.incorrect_class as annotation_incorrect_class,
-                           a.notes as annotation_notes,
-                           a.created_at as annotation_created_at,
-                           a.updated_at as annotation_updated_at
-                    FROM detections d
-                    LEFT JOIN detection_annotations a ON d.id = a.detection_id
-                    WHERE {where_clause}
-                    ORDER BY d.timestamp DESC
-                    LIMIT %s OFFSET %s
-                """
-                params.extend([page_size, offset])
-                cur.execute(query, params)
-                
-                rows = cur.fetchall()
-                detections = []
-                for row in rows:
-                    detection = dict(row)
-                    # Add UTC timezone info to naive timestamps (stored as UTC in TIMESTAMP column)
-                    if detection.get('timestamp') and detection['timestamp'].tzinfo is None:
-                        detection['timestamp'] = detection['timestamp'].replace(tzinfo=timezone.utc)
-                    if detection.get('detected_at') and detection['detected_at'] and detection['detected_at'].tzinfo is None:
-                        detection['detected_at'] = detection['detected_at'].replace(tzinfo=timezone.utc)
-                    if detection.get('created_at') and detection['created_at'].tzinfo is None:
-                        detection['created_at'] = detection['created_at'].replace(tzinfo=timezone.utc)
-                    # Parse JSONB fields
-                    import json
-                    if detection.get('bounding_boxes'):
-                        if isinstance(detection['bounding_boxes'], str):
-                            detection['bounding_boxes'] = json.loads(detection['bounding_boxes'])
-                    if detection.get('metadata'):
-                        if isinstance(detection['metadata'], str):
-                            detection['metadata'] = json.loads(detection['metadata'])
-                    if detection.get('weather'):
-                        if isinstance(detection['weather'], str):
-                            detection['weather'] = json.loads(detection['weather'])
-                    # Build annotation object if present
-                    if detection.get('annotation_id'):
-                        detection['annotation'] = {
-                            'id': detection['annotation_id'],
-                            'detection_id': detection['id'],
-                            'is_correct': detection['annotation_is_correct'],
-                            'correct_class': detection['annotation_correct_class'],
-                            'incorrect_class': detection['annotation_incorrect_class'],
-                            'notes': detection['annotation_notes'],
-                            'created_at': detection['annotation_created_at'],
-                            'updated_at': detection['annotation_updated_at']
-                        }
-                        # Add timezone info to annotation timestamps
-                        if detection['annotation']['created_at'] and detection['annotation']['created_at'].tzinfo is None:
-                            detection['annotation']['created_at'] = detection['annotation']['created_at'].replace(tzinfo=timezone.utc)
-                        if detection['annotation']['updated_at'] and detection['annotation']['updated_at'].tzinfo is None:
-                            detection['annotation']['updated_at'] = detection['annotation']['updated_at'].replace(tzinfo=timezone.utc)
-                    # Remove individual annotation fields
-                    for key in ['annotation_id', 'annotation_is_correct', 'annotation_correct_class', 
-                               'annotation_incorrect_class', 'annotation_notes', 'annotation_created_at', 'annotation_updated_at']:
-                        detection.pop(key, None)
-                    detections.append(detection)
+            with self._conn(self.read_statement_timeout) as conn, conn.cursor(cursor_factory=NamedTupleCursor) as cur:
+                mask, where_clause, params = _detection_filter(
+                    is_bird, is_human, category, start_date, end_date
+                )
                 
-                return detections, total
+                keyset = before_timestamp is not None and before_id is not None
+                if keyset and before_timestamp.tzinfo is not None:
+                    # Column is a naive UTC TIMESTAMP (rows are returned with UTC attached)
+                    before_timestamp = before_timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+                
+                # Get the page with annotation info, shaped and aggregated into one
+                # JSON array server-side (returned as text, so psycopg2 doesn't
+                # decode it either). The window count carries the filtered total
+                # so no separate COUNT(*) is needed; with a keyset cursor the
+                # window would only see the remaining rows, so the total comes
+                # from a separate COUNT(*), cached per filter so walking pages
+                # by cursor doesn't rescan the filtered set on every page.
+                offset = 0 if keyset else (page - 1) * page_size
+                page_params = params + [before_timestamp, before_id] if keyset else params
+                query = _detections_page_sql(mask, keyset, _detection_columns(fields))
+                cur.execute(query, page_params + [page_size, offset])
+                
+                page_row = cur.fetchone()
+                if page_row.row_count and not keyset:
+                    total = page_row.total_count
+                elif offset == 0 and not keyset:
+                    total = 0
+                else:
+                    # Keyset page, or a page past the end: no window count to read
+                    total = self._count_detections(cur, mask, where_clause, params)
+                last = None
+                if page_row.row_count == page_size:
+                    last = (page_row.last_timestamp, page_row.last_id)
+                
+                return page_row.items, total, last
+        except QueryCanceled:
+            raise
         except Exception as e:
             logger.error(f"Error getting detections: {e}")
-            return [], 0
+            return "[]", 0, None
+    
+    def _count_detections(self, cur, mask: int, where_clause: str, params: list) -> int:
+        """Filtered detection count, cached for READ_CACHE_TTL like the other dashboard reads."""
+        key = f"count:{mask}:{params!r}"
+        entry = self._cache.get(key)
+        now = time.monotonic()
+        if entry is not None and entry[0] > now:
+            return entry[1]
+        cur.execute(f"SELECT COUNT(*) FROM detections WHERE {where_clause}", params)
+        total = cur.fetchone()[0]
+        if len(self._cache) >= DETECTION_COUNT_CACHE_SIZE:
+            for stale_key, (expires, _) in list(self._cache.items()):
+                if expires <= now:
+                    self._cache.pop(stale_key, None)
+        if len(self._cache) < DETECTION_COUNT_CACHE_SIZE:
+            self._cache[key] = (now + READ_CACHE_TTL, total)
+        return total
+    
+    def open_detections_export(
+        self,
+        is_bird: Optional[bool] = None,
+        is_human: Optional[bool] = None,
+        category: Optional[str] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        fields: Optional[List[str]] = None,
+        limit: int = EXPORT_MAX_ROWS
+    ) -> Optional[Iterator[str]]:
+        """
+        Start an export of up to limit matching detections, newest first.
+        
+        Returns an iterator of JSON texts, or None when EXPORT_MAX_CONCURRENT
+        exports are already running. The query runs on a dedicated
+        (non-pooled) connection through a named cursor, EXPORT_ITERSIZE rows
+        per round trip; connection and slot are released when the iterator
+        is exhausted or closed. Errors opening the export raise here; errors
+        mid-stream propagate from the iterator so the response is aborted
+        rather than ending as if complete.
+        """
+        if not self._export_slots.acquire(blocking=False):
+            return None
+        mask, _, params = _detection_filter(
+            is_bird, is_human, category, start_date, end_date
+        )
+        try:
+            conn = self._direct_connection()
+        except BaseException:
+            self._export_slots.release()
+            raise
+        try:
+            cur = conn.cursor(name='detections_export')
+            cur.itersize = EXPORT_ITERSIZE
+            cur.execute(
+                _detections_export_sql(mask, _detection_columns(fields)),
+                params + [min(limit, EXPORT_MAX_ROWS)]
+            )
+        except BaseException:
+            conn.close()
+            self._export_slots.release()
+            raise
+        return self._iter_export(conn, cur)
+    
+    def _iter_export(self, conn, cur) -> Iterator[str]:
+        try:
+            for (item,) in cur:
+                yield item
+        except psycopg2.Error as e:
+            logger.error(f"Error exporting detections: {e}")
+            raise
         finally:
-            self.return_connection(conn)
+            conn.close()
+            self._export_slots.release()
     
     def get_detection_by_id(self, detection_id: int) -> Optional[Dict[str, Any]]:
         """Get a single detection by ID."""
-        conn = self.get_connection()
-        if not conn:
-            return None
-        
         try:
-            with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
-                cur.execute("""
-                    SELECT d.*, 
-                           a.id as annotation_id,
-                           a.is_correct as annotation_is_correct,
-                           a.correct_class as annotation_correct_class,
-                           a.incorrect_class as annotation_incorrect_class,
-                           a.notes as annotation_notes,
-                           a.created_at as annotation_created_at,
-                           a.updated_at as annotation_updated_at
-                    FROM detections d
-                    LEFT JOIN detection_annotations a ON d.id = a.detection_id
-                    WHERE d.id = %s
-                """, (detection_id,))
+            with self._conn(self.read_statement_timeout) as conn, conn.cursor() as cur:
+                self._execute_prepared(cur, 'detection_by_id', (detection_id,))
                 row = cur.fetchone()
                 if row:
-                    detection = dict(row)
-                    # Add UTC timezone info to naive timestamps (stored as UTC in TIMESTAMP column)
-                    if detection.get('timestamp') and detection['timestamp'].tzinfo is None:
-                        detection['timestamp'] = detection['timestamp'].replace(tzinfo=timezone.utc)
-                    if detection.get('detected_at') and detection['detected_at'] and detection['detected_at'].tzinfo is None:
-                        detection['detected_at'] = detection['detected_at'].replace(tzinfo=timezone.utc)
-                    if detection.get('created_at') and detection['created_at'].tzinfo is None:
-                        detection['created_at'] = detection['created_at'].replace(tzinfo=timezone.utc)
-                    # Parse JSONB fields
-                    import json
-                    if detection.get('bounding_boxes'):
-                        if isinstance(detection['bounding_boxes'], str):
-                            detection['bounding_boxes'] = json.loads(detection['bounding_boxes'])
-                    if detection.get('metadata'):
-                        if isinstance(detection['metadata'], str):
-                            detection['metadata'] = json.loads(detection['metadata'])
-                    if detection.get('weather'):
-                        if isinstance(detection['weather'], str):
-                            detection['weather'] = json.loads(detection['weather'])
-                    # Build annotation object if present
-                    if detection.get('annotation_id'):
-                        detection['annotation'] = {
-                            'id': detection['annotation_id'],
-                            'detection_id': detection['id'],
-                            'is_correct': detection['annotation_is_correct'],
-                            'correct_class': detection['annotation_correct_class'],
-                            'incorrect_class': detection['annotation_incorrect_class'],
-                            'notes': detection['annotation_notes'],
-                            'created_at': detection['annotation_created_at'],
-                            'updated_at': detection['annotation_updated_at']
-                        }
-                        # Add timezone info to annotation timestamps
-                        if detection['annotation']['created_at'] and detection['annotation']['created_at'].tzinfo is None:
-                            detection['annotation']['created_at'] = detection['annotation']['created_at'].replace(tzinfo=timezone.utc)
-                        if detection['annotation']['updated_at'] and detection['annotation']['updated_at'].tzinfo is None:
-                            detection['annotation']['updated_at'] = detection['annotation']['updated_at'].replace(tzinfo=timezone.utc)
-                    # Remove individual annotation fields
-                    for key in ['annotation_id', 'annotation_is_correct', 'annotation_correct_class', 
-                               'annotation_incorrect_class', 'annotation_notes', 'annotation_created_at', 'annotation_updated_at']:
-                        detection.pop(key, None)
-                    return detection
+                    return _hydrate_detection(row)
                 return None
+        except QueryCanceled:
+            raise
         except Exception as e:
             logger.error(f"Error getting detection: {e}")
             return None
-        finally:
-            self.return_connection(conn)
     
     def get_latest_detection(self) -> Optional[Dict[str, Any]]:
         """Get the most recent detection."""
-        conn = self.get_connection()
-        if not conn:
-            return None
-        
         try:
-            with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
-                cur.execute("""
-                    SELECT * FROM detections
-                    ORDER BY timestamp DESC
-                    LIMIT 1
-                """)
+            with self._conn(self.read_statement_timeout) as conn, conn.cursor() as cur:
+                self._execute_prepared(cur, 'latest_detection')
                 row = cur.fetchone()
                 if row:
-                    detection = dict(row)
-                    # Add UTC timezone info to naive timestamps (stored as UTC in TIMESTAMP column)
-                    if detection.get('timestamp') and detection['timestamp'].tzinfo is None:
-                        detection['timestamp'] = detection['timestamp'].replace(tzinfo=timezone.utc)
-                    if detection.get('detected_at') and detection['detected_at'] and detection['detected_at'].tzinfo is None:
-                        detection['detected_at'] = detection['detected_at'].replace(tzinfo=timezone.utc)
-                    if detection.get('created_at') and detection['created_at'].tzinfo is None:
-                        detection['created_at'] = detection['created_at'].replace(tzinfo=timezone.utc)
-                    # Parse JSONB fields
-                    import json
-                    if detection.get('bounding_boxes'):
-                        if isinstance(detection['bounding_boxes'], str):
-                            detection['bounding_boxes'] = json.loads(detection['bounding_boxes'])
-                    if detection.get('metadata'):
-                        if isinstance(detection['metadata'], str):
-                            detection['metadata'] = json.loads(detection['metadata'])
-                    if detection.get('weather'):
-                        if isinstance(detection['weather'], str):
-                            detection['weather'] = json.loads(detection['weather'])
-                    return detection
+                    return _hydrate_detection(row)
                 return None
+        except QueryCanceled:
+            raise
         except Exception as e:
             logger.error(f"Error getting latest detection: {e}")
             return None
-        finally:
-            self.return_connection(conn)
     
+    @ttl_cached(READ_CACHE_TTL)
     def get_stats(self) -> Dict[str, Any]:
         """Get statistics about detections."""
-        conn = self.get_connection()
-        if not conn:
-            return {}
-        
         try:
-            with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
-                # Total detections
-                cur.execute("SELECT COUNT(*) as total FROM detections")
-                total = cur.fetchone()['total']
-                
-                # Birds detected
-                cur.execute("SELECT COUNT(*) as birds FROM detections WHERE is_bird = true")
-                birds = cur.fetchone()['birds']
-                
-                # Humans detected
-                cur.execute("SELECT COUNT(*) as humans FROM detections WHERE is_human = true")
-                humans = cur.fetchone()['humans']
-                
-                # Squirrels detected
-                cur.execute("SELECT COUNT(*) as squirrels FROM detections WHERE is_squirrel = true")
-                squirrels = cur.fetchone()['squirrels']
-                
-                # Recent activity (24h)
-                yesterday = datetime.now() - timedelta(days=1)
-                cur.execute("SELECT COUNT(*) as recent_24h FROM detections WHERE created_at >= %s", (yesterday,))
-                recent_24h = cur.fetchone()['recent_24h']
-                
-                # Recent activity (7d)
-                week_ago = datetime.now() - timedelta(days=7)
-                cur.execute("SELECT COUNT(*) as recent_7d FROM detections WHERE created_at >= %s", (week_ago,))
-                recent_7d = cur.fetchone()['recent_7d']
-                
-                # Average confidence for birds and humans
+            with self._conn(self.read_statement_timeout) as conn, conn.cursor(cursor_factory=NamedTupleCursor) as cur:
+                # All counters from one scan with conditional aggregates. The
+                # windows use the server clock: created_at defaults to the
+                # server's CURRENT_TIMESTAMP, and LOCALTIMESTAMP is its naive form.
                 cur.execute("""
-                    SELECT AVG(confidence) as avg_conf
+                    SELECT
+                        COUNT(*) AS total,
+                        COUNT(*) FILTER (WHERE is_bird = true) AS birds,
+                        COUNT(*) FILTER (WHERE is_human = true) AS humans,
+                        COUNT(*) FILTER (WHERE is_squirrel = true) AS squirrels,
+                        COUNT(*) FILTER (WHERE created_at >= LOCALTIMESTAMP - INTERVAL '1 day') AS recent_24h,
+                        COUNT(*) FILTER (WHERE created_at >= LOCALTIMESTAMP - INTERVAL '7 days') AS recent_7d,
+                        AVG(confidence) FILTER (
+                            WHERE (is_bird = true OR is_human = true OR is_squirrel = true)
+                              AND confidence IS NOT NULL
+                        ) AS avg_conf
                     FROM detections
-                    WHERE (is_bird = true OR is_human = true OR is_squirrel = true) AND confidence IS NOT NULL
                 """)
-                avg_conf_row = cur.fetchone()
-                avg_conf = float(avg_conf_row['avg_conf']) if avg_conf_row['avg_conf'] else None
-                
+                row = cur.fetchone()
                 return {
-                    'total_detections': total,
-                    'birds_detected': birds,
-                    'humans_detected': humans,
-                    'squirrels_detected': squirrels,
-                    'recent_activity_24h': recent_24h,
-                    'recent_activity_7d': recent_7d,
-                    'average_confidence': avg_conf
+                    'total_detections': row.total,
+                    'birds_detected': row.birds,
+                    'humans_detected': row.humans,
+                    'squirrels_detected': row.squirrels,
+                    'recent_activity_24h': row.recent_24h,
+                    'recent_activity_7d': row.recent_7d,
+                    'average_confidence': float(row.avg_conf) if row.avg_conf else None
                 }
+        except QueryCanceled:
+            raise
         except Exception as e:
             logger.error(f"Error getting stats: {e}")
             return {}
-        finally:
-            self.return_connection(conn)
     
-    def delete_detection(self, detection_id: int) -> bool:
-        """Delete a detection by ID."""
-        conn = self.get_connection()
-        if not conn:
-            return False
+    def get_data_version(self) -> Optional[str]:
+        """
+        Version of the detections and annotations data, for HTTP ETags.
         
+        data_version is bumped by statement triggers inside every writing
+        transaction, so it is never behind the rows a later query returns.
+        It is read uncached (a single-row primary key lookup): a cached or
+        lagging version could answer 304 for data that has changed. None
+        (e.g. the storage service hasn't created the table yet) means no
+        ETag and no 304. A version change also drops the TTL-cached reads, so
+        a response tagged with the new version isn't built from older data.
+        """
         try:
-            with conn.cursor() as cur:
-                cur.execute("DELETE FROM detections WHERE id = %s", (detection_id,))
+            with self._conn(self.read_statement_timeout) as conn, conn.cursor() as cur:
+                cur.execute("SELECT version FROM data_version")
+                row = cur.fetchone()
+            if row is None:
+                return None
+            if row[0] != self._data_version:
+                self.invalidate_cache()
+                self._data_version = row[0]
+            return str(row[0])
+        except QueryCanceled:
+            raise
+        except Exception as e:
+            logger.error(f"Error getting data version: {e}")
+            return None
+    
+    def delete_detection(self, detection_id: int) -> Tuple[bool, Optional[str]]:
+        """
+        Delete a detection by ID.
+        Returns tuple of (deleted, image_path)
+        """
+        try:
+            with self._conn() as conn, conn.cursor() as cur:
+                self._execute_prepared(cur, 'delete_detection', (detection_id,))
+                row = cur.fetchone()
                 conn.commit()
-                deleted = cur.rowcount > 0
-                if deleted:
-                    logger.info(f"Deleted detection {detection_id}")
-                return deleted
+                if row is None:
+                    return False, None
+                self.invalidate_cache()
+                logger.info(f"Deleted detection {detection_id}")
+                return True, row[0]
         except Exception as e:
             logger.error(f"Error deleting detection {detection_id}: {e}")
-            conn.rollback()
-            return False
-        finally:
-            self.return_connection(conn)
+            return False, None
     
-    def delete_detections_bulk(self, detection_ids: List[int]) -> int:
-        """Delete multiple detections by IDs. Returns number of deleted rows."""
+    def delete_detections_bulk(self, detection_ids: List[int]) -> Tuple[int, List[str]]:
+        """
+        Delete multiple detections by IDs.
+        Returns tuple of (deleted_count, image_paths)
+        """
         if not detection_ids:
-            return 0
-        
-        conn = self.get_connection()
-        if not conn:
-            return 0
+            return 0, []
         
         try:
-            with conn.cursor() as cur:
-                # Use parameterized query with tuple for IN clause
-                placeholders = ','.join(['%s'] * len(detection_ids))
-                cur.execute(
-                    f"DELETE FROM detections WHERE id IN ({placeholders})",
-                    tuple(detection_ids)
-                )
+            with self._conn() as conn, conn.cursor() as cur:
+                # The ids travel as one int array parameter, so the statement
+                # text stays the same size however many ids are passed, and
+                # RETURNING saves a separate image path lookup.
+                ids = [int(detection_id) for detection_id in detection_ids]
+                self._execute_prepared(cur, 'delete_detections', (ids,))
+                image_paths = [row[0] for row in cur]
                 deleted_count = cur.rowcount
                 conn.commit()
+                self.invalidate_cache()
                 logger.info(f"Bulk deleted {deleted_count} detections")
-                return deleted_count
+                return deleted_count, image_paths
         except Exception as e:
-            conn.rollback()
             logger.error(f"Error bulk deleting detections: {e}")
-            return 0
-        finally:
-            self.return_connection(conn)
-    
-    def get_detection_image_paths(self, detection_ids: List[int]) -> List[str]:
-        """Get image paths for given detection IDs."""
-        if not detection_ids:
-            return []
-        
-        conn = self.get_connection()
-        if not conn:
-            return []
-        
-        try:
-            with conn.cursor() as cur:
-                placeholders = ','.join(['%s'] * len(detection_ids))
-                cur.execute(
-                    f"SELECT image_path FROM detections WHERE id IN ({placeholders})",
-                    tuple(detection_ids)
-                )
-                rows = cur.fetchall()
-                return [row[0] for row in rows]
-        except Exception as e:
-            logger.error(f"Error getting image paths: {e}")
-            return []
-        finally:
-            self.return_connection(conn)
+            return 0, []
     
     def delete_detections_by_filter(
         self,
@@ -438,65 +754,32 @@ class Database:
         Delete detections by filter criteria.
         Returns tuple of (deleted_count, image_paths)
         """
-        conn = self.get_connection()
-        if not conn:
-            return 0, []
-        
         try:
-            with conn.cursor() as cur:
-                # Build WHERE clause
-                conditions = []
-                params = []
-                
-                if category:
-                    conditions.append("category = %s")
-                    params.append(category)
-                
-                if start_date:
-                    conditions.append("timestamp >= %s")
-                    params.append(start_date)
-                
-                if end_date:
-                    conditions.append("timestamp <= %s")
-                    params.append(end_date)
-                
-                if is_bird is not None:
-                    conditions.append("is_bird = %s")
-                    params.append(is_bird)
-                
-                if is_human is not None:
-                    conditions.append("is_human = %s")
-                    params.append(is_human)
-                
-                if not conditions:
+            with self._conn() as conn, conn.cursor() as cur:
+                mask, where_clause, params = _detection_filter(
+                    is_bird, is_human, category, start_date, end_date
+                )
+                if not mask:
                     # Don't delete all if no conditions
                     logger.warning("No filter conditions provided for bulk delete")
                     return 0, []
                 
-                where_clause = " AND ".join(conditions)
-                
-                # Get image paths first
+                # Delete and collect the image paths in one scan. Postgres
+                # won't DECLARE a cursor over a DELETE, and the caller needs
+                # the whole list anyway, so this stays a client-side fetch.
                 cur.execute(
-                    f"SELECT image_path FROM detections WHERE {where_clause}",
-                    params
-                )
-                image_paths = [row[0] for row in cur.fetchall()]
-                
-                # Delete detections
-                cur.execute(
-                    f"DELETE FROM detections WHERE {where_clause}",
+                    f"DELETE FROM detections WHERE {where_clause} RETURNING image_path",
                     params
                 )
+                image_paths = [row[0] for row in cur]
                 deleted_count = cur.rowcount
                 conn.commit()
+                self.invalidate_cache()
                 logger.info(f"Bulk deleted {deleted_count} detections by filter")
                 return deleted_count, image_paths
         except Exception as e:
-            conn.rollback()
             logger.error(f"Error bulk deleting by filter: {e}")
             return 0, []
-        finally:
-            self.return_connection(conn)
     
     def create_or_update_annotation(
         self,
@@ -505,78 +788,33 @@ class Database:
         correct_class: Optional[str] = None,
         incorrect_class: Optional[str] = None,
         notes: Optional[str] = None
-    ) -> Optional[int]:
-        """Create or update an annotation for a detection. Returns annotation ID."""
-        conn = self.get_connection()
-        if not conn:
-            return None
-        
+    ) -> Optional[Dict[str, Any]]:
+        """Create or update an annotation for a detection. Returns the stored annotation."""
         try:
-            with conn.cursor() as cur:
-                # Check if annotation exists
-                cur.execute("SELECT id FROM detection_annotations WHERE detection_id = %s", (detection_id,))
-                existing = cur.fetchone()
-                
-                if existing:
-                    # Update existing annotation
-                    cur.execute("""
-                        UPDATE detection_annotations
-                        SET is_correct = %s,
-                            correct_class = %s,
-                            incorrect_class = %s,
-                            notes = %s,
-                            updated_at = CURRENT_TIMESTAMP
-                        WHERE detection_id = %s
-                        RETURNING id
-                    """, (is_correct, correct_class, incorrect_class, notes, detection_id))
-                    annotation_id = cur.fetchone()[0]
-                else:
-                    # Create new annotation
-                    cur.execute("""
-                        INSERT INTO detection_annotations (
-                            detection_id, is_correct, correct_class, incorrect_class, notes
-                        ) VALUES (%s, %s, %s, %s, %s)
-                        RETURNING id
-                    """, (detection_id, is_correct, correct_class, incorrect_class, notes))
-                    annotation_id = cur.fetchone()[0]
+            with self._conn() as conn, conn.cursor(cursor_factory=NamedTupleCursor) as cur:
+                # One statement: insert, or update in place on the UNIQUE(detection_id),
+                # returning the row so callers don't read it back
+                cur.execute(f"""
+                    INSERT INTO detection_annotations AS a (
+                        detection_id, is_correct, correct_class, incorrect_class, notes
+                    ) VALUES (%s, %s, %s, %s, %s)
+                    ON CONFLICT (detection_id) DO UPDATE
+                    SET is_correct = EXCLUDED.is_correct,
+                        correct_class = EXCLUDED.correct_class,
+                        incorrect_class = EXCLUDED.incorrect_class,
+                        notes = EXCLUDED.notes,
+                        updated_at = CURRENT_TIMESTAMP
+                    RETURNING {ANNOTATION_SELECT}
+                """, (detection_id, is_correct, correct_class, incorrect_class, notes))
+                annotation = _hydrate_annotation(cur.fetchone())
                 
                 conn.commit()
-                logger.info(f"Created/updated annotation {annotation_id} for detection {detection_id}")
-                return annotation_id
+                self.invalidate_cache()
+                logger.info(f"Created/updated annotation {annotation['id']} for detection {detection_id}")
+                return annotation
         except Exception as e:
-            conn.rollback()
             logger.error(f"Error creating/updating annotation: {e}")
             return None
-        finally:
-            self.return_connection(conn)
-    
-    def get_annotation_by_detection_id(self, detection_id: int) -> Optional[Dict[str, Any]]:
-        """Get annotation for a detection by detection ID."""
-        conn = self.get_connection()
-        if not conn:
-            return None
-        
-        try:
-            with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
-                cur.execute("""
-                    SELECT * FROM detection_annotations
-                    WHERE detection_id = %s
-                """, (detection_id,))
-                row = cur.fetchone()
-                if row:
-                    annotation = dict(row)
-                    # Add UTC timezone info to naive timestamps
-                    if annotation.get('created_at') and annotation['created_at'].tzinfo is None:
-                        annotation['created_at'] = annotation['created_at'].replace(tzinfo=timezone.utc)
-                    if annotation.get('updated_at') and annotation['updated_at'].tzinfo is None:
-                        annotation['updated_at'] = annotation['updated_at'].replace(tzinfo=timezone.utc)
-                    return annotation
-                return None
-        except Exception as e:
-            logger.error(f"Error getting annotation: {e}")
-            return None
-        finally:
-            self.return_connection(conn)
     
     def get_annotations(
         self,
@@ -585,12 +823,8 @@ class Database:
         is_correct: Optional[bool] = None
     ) -> tuple[List[Dict[str, Any]], int]:
         """Get annotations with pagination and filters. Returns (annotations, total)."""
-        conn = self.get_connection()
-        if not conn:
-            return [], 0
-        
         try:
-            with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
+            with self._conn(self.read_statement_timeout) as conn, conn.cursor(cursor_factory=NamedTupleCursor) as cur:
                 # Build WHERE clause
                 conditions = []
                 params = []
@@ -601,63 +835,56 @@ class Database:
                 
                 where_clause = " AND ".join(conditions) if conditions else "1=1"
                 
-                # Get total count
-                count_query = f"SELECT COUNT(*) FROM detection_annotations WHERE {where_clause}"
-                cur.execute(count_query, params)
-                total = cur.fetchone()['count']
-                
-                # Get paginated results
+                # Get paginated results; the window count carries the total
                 offset = (page - 1) * page_size
                 query = f"""
-                    SELECT * FROM detection_annotations
+                    SELECT {ANNOTATION_SELECT}, COUNT(*) OVER () AS total_count
+                    FROM detection_annotations a
                     WHERE {where_clause}
-                    ORDER BY created_at DESC
+                    ORDER BY a.created_at DESC
                     LIMIT %s OFFSET %s
                 """
-                params.extend([page_size, offset])
-                cur.execute(query, params)
+                cur.execute(query, params + [page_size, offset])
                 
                 rows = cur.fetchall()
-                annotations = []
-                for row in rows:
-                    annotation = dict(row)
-                    # Add UTC timezone info to naive timestamps
-                    if annotation.get('created_at') and annotation['created_at'].tzinfo is None:
-                        annotation['created_at'] = annotation['created_at'].replace(tzinfo=timezone.utc)
-                    if annotation.get('updated_at') and annotation['updated_at'].tzinfo is None:
-                        annotation['updated_at'] = annotation['updated_at'].replace(tzinfo=timezone.utc)
-                    annotations.append(annotation)
+                if rows:
+                    total = rows[0].total_count
+                elif offset == 0:
+                    total = 0
+                else:
+                    # Page past the end: no window count to read
+                    cur.execute(f"SELECT COUNT(*) FROM detection_annotations WHERE {where_clause}", params)
+                    total = cur.fetchone()[0]
+                annotations = [_hydrate_annotation(row) for row in rows]
                 
                 return annotations, total
+        except QueryCanceled:
+            raise
         except Exception as e:
             logger.error(f"Error getting annotations: {e}")
             return [], 0
-        finally:
-            self.return_connection(conn)
     
     def delete_annotation(self, detection_id: int) -> bool:
         """Delete an annotation by detection ID."""
-        conn = self.get_connection()
-        if not conn:
-            return False
-        
         try:
-            with conn.cursor() as cur:
-                cur.execute("DELETE FROM detection_annotations WHERE detection_id = %s", (detection_id,))
+            with self._conn() as conn, conn.cursor() as cur:
+                self._execute_prepared(cur, 'delete_annotation', (detection_id,))
                 conn.commit()
                 deleted = cur.rowcount > 0
                 if deleted:
+                    self.invalidate_cache()
                     logger.info(f"Deleted annotation for detection {detection_id}")
                 return deleted
         except Exception as e:
             logger.error(f"Error deleting annotation: {e}")
-            conn.rollback()
             return False
-        finally:
-            self.return_connection(conn)
     
     def close(self):
         """Close all connections in the pool."""
+        with self._health_lock:
+            if self._health_conn is not None:
+                self._health_conn.close()
+                self._health_conn = None
         if self.connection_pool:
             self.connection_pool.closeall()
             logger.info("Database connection pool closed")
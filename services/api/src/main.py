@@ -5,15 +5,28 @@ Provides REST API and serves frontend.
 """
 import os
 import sys
+import asyncio
+import base64
+import binascii
+import functools
+import json
 import logging
-import requests
+import mimetypes
+import time
+import httpx
+import psycopg2
+from psycopg2.errors import QueryCanceled
 from datetime import datetime
-from typing import Optional
-from fastapi import FastAPI, HTTPException, Query, status, Body
-from fastapi.responses import FileResponse, HTMLResponse, StreamingResponse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+from fastapi import FastAPI, HTTPException, Query, Request, status, Body
+from fastapi.responses import FileResponse, HTMLResponse, ORJSONResponse, Response, StreamingResponse
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
+from starlette.background import BackgroundTask
 from pathlib import Path
-from database import Database
+from urllib.parse import quote
+from database import Database, EXPORT_MAX_ROWS
 from models import (
     DetectionResponse, DetectionListResponse, StatsResponse, HealthResponse, WeatherResponse,
     BulkDeleteRequest, BulkDeleteByFilterRequest, BulkDeleteResponse,
@@ -35,6 +48,44 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Upstream results served from memory: weather moves on the scale of minutes,
+# capture status is polled by every open dashboard
+WEATHER_CACHE_TTL = 60.0
+CAPTURE_STATUS_CACHE_TTL = 1.0
+# Load balancer probes within this window reuse the last healthy response
+HEALTH_RESPONSE_TTL = 1.0
+
+def async_ttl_cached(ttl: float):
+    """
+    Cache a coroutine function's result per positional args for ttl seconds
+    (exceptions and None aren't cached). Concurrent misses for the same key
+    share one in-flight call instead of each going upstream.
+    """
+    def decorator(func):
+        cache = {}
+        in_flight = {}
+        
+        async def fetch(key):
+            value = await func(*key)
+            if value is not None:
+                cache[key] = (time.monotonic() + ttl, value)
+            return value
+        
+        @functools.wraps(func)
+        async def wrapper(*args):
+            entry = cache.get(args)
+            if entry is not None and entry[0] > time.monotonic():
+                return entry[1]
+            task = in_flight.get(args)
+            if task is None:
+                task = asyncio.ensure_future(fetch(args))
+                in_flight[args] = task
+                task.add_done_callback(lambda _: in_flight.pop(args, None))
+            # shield: one caller disconnecting mustn't cancel the others' fetch
+            return await asyncio.shield(task)
+        return wrapper
+    return decorator
+
 # Load configuration
 def load_config():
     return {
@@ -43,13 +94,25 @@ def load_config():
         'postgres_db': os.getenv('POSTGRES_DB', 'birdmonitor'),
         'postgres_user': os.getenv('POSTGRES_USER', 'birdmonitor'),
         'postgres_password': os.getenv('POSTGRES_PASSWORD', 'changeme265'),
+        'pg_pool_min': int(os.getenv('DB_POOL_MIN_SIZE', 2)),
+        'pg_pool_max': int(os.getenv('DB_POOL_MAX_SIZE', 20)),
+        # Postgres interval text, e.g. '30s' or '2min'
+        'read_statement_timeout': os.getenv('DB_READ_STATEMENT_TIMEOUT', '30s'),
+        # Worker processes (read by the uvicorn CLI too); each opens its own pool
+        'web_concurrency': int(os.getenv('WEB_CONCURRENCY', 1)),
         'images_path': os.getenv('IMAGES_PATH', 'data/images'),
         'static_path': os.getenv('STATIC_PATH', 'static'),
         'capture_service_url': os.getenv('CAPTURE_SERVICE_URL', 'http://capture-service:8080'),
         'zip_code': os.getenv('ZIP_CODE', '34232'),
+        # Behind nginx, hand image/video bodies to it via X-Accel-Redirect
+        'use_xaccel': os.getenv('USE_XACCEL', 'false').lower() == 'true',
+        'xaccel_prefix': os.getenv('XACCEL_PREFIX', '/_protected_images/'),
     }
 
 config = load_config()
+# Resolved once; request paths are checked against these with a string prefix
+IMAGES_ROOT = Path(config['images_path']).resolve()
+STATIC_ROOT = Path(config['static_path']).resolve()
 db = Database(config)
 # Initialize ImageManager if available
 image_manager = None
@@ -65,92 +128,247 @@ if IMAGE_MANAGER_AVAILABLE:
 app = FastAPI(
     title="Bird and Human Monitor API",
     description="REST API for bird and human monitoring system",
-    version="1.0.0"
+    version="1.0.0",
+    # Model and dict responses are rendered by orjson (in C) instead of json.dumps
+    default_response_class=ORJSONResponse
+)
+
+class MediaAwareGZipMiddleware(GZipMiddleware):
+    """GZip responses, except on routes that serve already-compressed media."""
+    def __init__(self, app, exclude_prefixes: Tuple[str, ...] = (), **kwargs):
+        super().__init__(app, **kwargs)
+        self.exclude_prefixes = exclude_prefixes
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].startswith(self.exclude_prefixes):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+# JSON lists and stats compress several-fold; JPEG and video don't
+app.add_middleware(
+    MediaAwareGZipMiddleware,
+    minimum_size=1024,
+    compresslevel=5,
+    exclude_prefixes=('/api/images/', '/api/videos/', '/api/live', '/api/capture-snapshot')
 )
 
+@app.exception_handler(QueryCanceled)
+async def query_canceled_handler(request: Request, exc: QueryCanceled):
+    """A read that ran past the statement timeout is a 504, not an empty 200."""
+    logger.warning(f"Query timed out on {request.url.path}: {exc}")
+    return ORJSONResponse(status_code=504, content={"detail": "Database query timed out"})
+
 # Mount static files
-static_path = Path(config['static_path'])
-if static_path.exists():
-    app.mount("/static", StaticFiles(directory=str(static_path)), name="static")
+if STATIC_ROOT.exists():
+    app.mount("/static", StaticFiles(directory=str(STATIC_ROOT)), name="static")
 
 # Initialize database connection
 @app.on_event("startup")
 async def startup_event():
     logger.info("Starting API service...")
+    # One keep-alive pool to the capture service, shared by every request
+    app.state.http = httpx.AsyncClient(
+        base_url=config['capture_service_url'],
+        timeout=5.0,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20)
+    )
     if not db.connect():
         logger.error("Failed to connect to database")
     else:
         logger.info("✓ API service started")
+    # One thread per pooled connection: excess DB calls queue here rather
+    # than failing checkout, and file/weather work keeps the default executor
+    app.state.db_executor = ThreadPoolExecutor(max_workers=max(1, db.pool_max), thread_name_prefix='db')
 
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("Shutting down API service...")
+    await app.state.http.aclose()
+    app.state.db_executor.shutdown(wait=False)
     db.close()
 
+async def run_db(func, *args, **kwargs):
+    """Run a blocking Database call on the executor sized to the connection pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(app.state.db_executor, functools.partial(func, *args, **kwargs))
+
+@async_ttl_cached(CAPTURE_STATUS_CACHE_TTL)
+async def fetch_capture_status() -> dict:
+    response = await app.state.http.get("/capture/status", timeout=3)
+    response.raise_for_status()
+    return response.json()
+
 # Health check endpoint
 @app.get("/api/capture-status")
 async def get_capture_status():
     """Get capture service status including low light detection."""
-    capture_url = config['capture_service_url']
-    
     try:
-        response = requests.get(
-            f"{capture_url}/capture/status",
-            timeout=3
-        )
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
+        return await fetch_capture_status()
+    except (httpx.HTTPError, ValueError) as e:
+        # ValueError: a body that isn't valid JSON (JSONDecodeError subclasses it)
         logger.error(f"Error requesting capture status: {e}")
         raise HTTPException(status_code=503, detail=f"Failed to get capture status: {str(e)}")
 
+health_cache = {'expires': 0.0, 'response': None}
+
 @app.get("/api/health", response_model=HealthResponse)
 async def health_check():
     """Health check endpoint."""
-    db_healthy = db.check_health()
-    return HealthResponse(
+    now = time.monotonic()
+    if health_cache['response'] is not None and health_cache['expires'] > now:
+        return health_cache['response']
+    # Uses its own connection, so it mustn't queue behind pooled DB calls
+    db_healthy = await asyncio.to_thread(db.check_health)
+    health = HealthResponse(
         status="healthy" if db_healthy else "unhealthy",
         database="connected" if db_healthy else "disconnected",
         timestamp=datetime.now()
     )
+    if not db_healthy:
+        # Only healthy answers are reused; report recovery as soon as it happens
+        health_cache['response'] = None
+        return health
+    response = ORJSONResponse(health.model_dump(mode='json'))
+    health_cache.update(expires=now + HEALTH_RESPONSE_TTL, response=response)
+    return response
+
+async def check_data_etag(request: Request, suffix: str = '') -> Tuple[Optional[str], bool]:
+    """
+    ETag for a response built from the detections data, and whether the
+    client's If-None-Match already has it (so a 304 can skip the query).
+    suffix covers anything else the response depends on.
+    """
+    version = await run_db(db.get_data_version)
+    if not version:
+        return None, False
+    etag = f'"{version}{suffix}"'
+    return etag, etag_matches(request, etag)
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Whether the client's If-None-Match already covers etag."""
+    if_none_match = request.headers.get('if-none-match', '')
+    tags = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+    return etag in tags or '*' in tags
+
+def etag_headers(etag: Optional[str]) -> dict:
+    """Cache headers that make clients revalidate with If-None-Match each time."""
+    return {'ETag': etag, 'Cache-Control': 'no-cache'} if etag else {}
+
+def encode_cursor(timestamp: datetime, detection_id: int) -> str:
+    """Opaque keyset cursor for the row after which the next page starts."""
+    payload = json.dumps({'ts': timestamp.isoformat(), 'id': detection_id}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Inverse of encode_cursor; raises 400 on a malformed token."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        return datetime.fromisoformat(payload['ts']), int(payload['id'])
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
 # Get detections with pagination and filters
 @app.get("/api/detections", response_model=DetectionListResponse)
 async def get_detections(
+    request: Request,
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(20, ge=1, le=100, description="Items per page"),
     is_bird: Optional[bool] = Query(None, description="Filter by bird detection"),
     is_human: Optional[bool] = Query(None, description="Filter by human detection"),
     category: Optional[str] = Query(None, description="Filter by category (bird, human, both)"),
     start_date: Optional[datetime] = Query(None, description="Start date filter"),
-    end_date: Optional[datetime] = Query(None, description="End date filter")
+    end_date: Optional[datetime] = Query(None, description="End date filter"),
+    before_timestamp: Optional[datetime] = Query(None, description="Keyset cursor: timestamp of the last row seen"),
+    before_id: Optional[int] = Query(None, description="Keyset cursor: id of the last row seen"),
+    cursor: Optional[str] = Query(None, description="Opaque keyset cursor (next_cursor of the previous page)"),
+    fields: Optional[str] = Query(None, description="Comma-separated detection fields to return (default: all)")
 ):
-    """Get list of detections with pagination and filters."""
-    detections, total = db.get_detections(
+    """
+    Get list of detections with pagination and filters.
+    
+    cursor (or before_timestamp/before_id) pages by keyset; page/OFFSET is
+    kept for jumping straight to a page number.
+    """
+    if cursor:
+        before_timestamp, before_id = decode_cursor(cursor)
+    
+    etag, not_modified = await check_data_etag(request)
+    if not_modified:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=etag_headers(etag))
+    
+    # Postgres builds the detections array; only the envelope is assembled here
+    items, total, last = await run_db(
+        db.get_detections_json,
         page=page,
         page_size=page_size,
         is_bird=is_bird,
         is_human=is_human,
         category=category,
         start_date=start_date,
-        end_date=end_date
+        end_date=end_date,
+        before_timestamp=before_timestamp,
+        before_id=before_id,
+        fields=fields.split(',') if fields else None
     )
     
     total_pages = (total + page_size - 1) // page_size
-    
-    return DetectionListResponse(
-        detections=[DetectionResponse(**d) for d in detections],
-        total=total,
-        page=page,
-        page_size=page_size,
-        total_pages=total_pages
+    envelope = json.dumps({
+        'total': total,
+        'page': page,
+        'page_size': page_size,
+        'total_pages': total_pages,
+        'next_before_timestamp': last[0].isoformat() if last else None,
+        'next_before_id': last[1] if last else None,
+        'next_cursor': encode_cursor(*last) if last else None,
+    })
+    return Response(
+        content='{"detections":' + items + ',' + envelope[1:],
+        media_type="application/json",
+        headers=etag_headers(etag)
+    )
+
+# Export all matching detections as NDJSON (declared before /{detection_id})
+@app.get("/api/detections/export")
+async def export_detections(
+    is_bird: Optional[bool] = Query(None, description="Filter by bird detection"),
+    is_human: Optional[bool] = Query(None, description="Filter by human detection"),
+    category: Optional[str] = Query(None, description="Filter by category (bird, human, both)"),
+    start_date: Optional[datetime] = Query(None, description="Start date filter"),
+    end_date: Optional[datetime] = Query(None, description="End date filter"),
+    fields: Optional[str] = Query(None, description="Comma-separated detection fields to return (default: all)"),
+    limit: int = Query(EXPORT_MAX_ROWS, ge=1, le=EXPORT_MAX_ROWS, description="Maximum detections to export")
+):
+    """Stream matching detections (newest first, up to limit), one JSON object per line."""
+    # Opens its own connection, outside the pool (and so outside run_db)
+    try:
+        items = await asyncio.to_thread(
+            db.open_detections_export,
+            is_bird=is_bird,
+            is_human=is_human,
+            category=category,
+            start_date=start_date,
+            end_date=end_date,
+            fields=fields.split(',') if fields else None,
+            limit=limit
+        )
+    except psycopg2.Error as e:
+        logger.error(f"Error starting detections export: {e}")
+        raise HTTPException(status_code=503, detail="Export unavailable")
+    if items is None:
+        raise HTTPException(status_code=503, detail="Too many exports running, try again later")
+    # A sync iterator: StreamingResponse pulls it in the threadpool
+    return StreamingResponse(
+        (item + '\n' for item in items),
+        media_type="application/x-ndjson",
+        headers={'Content-Disposition': 'attachment; filename="detections.ndjson"'}
     )
 
 # Get single detection by ID
 @app.get("/api/detections/{detection_id}", response_model=DetectionResponse)
 async def get_detection(detection_id: int):
     """Get a single detection by ID."""
-    detection = db.get_detection_by_id(detection_id)
+    detection = await run_db(db.get_detection_by_id, detection_id)
     if not detection:
         raise HTTPException(status_code=404, detail="Detection not found")
     return DetectionResponse(**detection)
@@ -159,23 +377,15 @@ async def get_detection(detection_id: int):
 @app.delete("/api/detections/{detection_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_detection(detection_id: int):
     """Delete a detection by ID."""
-    # First check if detection exists
-    detection = db.get_detection_by_id(detection_id)
-    if not detection:
+    # Delete the detection and get its image path in one statement
+    deleted, image_path = await run_db(db.delete_detection, detection_id)
+    if not deleted:
         raise HTTPException(status_code=404, detail="Detection not found")
     
-    # Get image path before deletion
-    image_path = detection.get('image_path')
-    
-    # Delete the detection
-    success = db.delete_detection(detection_id)
-    if not success:
-        raise HTTPException(status_code=500, detail="Failed to delete detection")
-    
     # Delete image file if ImageManager is available
     if image_manager and image_path:
         try:
-            image_manager.delete_image_files([image_path])
+            await asyncio.to_thread(image_manager.delete_image_files, [image_path])
         except Exception as e:
             logger.warning(f"Could not delete image file {image_path}: {e}")
     
@@ -188,11 +398,8 @@ async def bulk_delete_detections(request: BulkDeleteRequest = Body(...)):
     if not request.detection_ids:
         raise HTTPException(status_code=400, detail="No detection IDs provided")
     
-    # Get image paths before deletion
-    image_paths = db.get_detection_image_paths(request.detection_ids)
-    
-    # Delete detections
-    deleted_count = db.delete_detections_bulk(request.detection_ids)
+    # Delete detections and get image paths
+    deleted_count, image_paths = await run_db(db.delete_detections_bulk, request.detection_ids)
     
     if deleted_count == 0:
         raise HTTPException(status_code=404, detail="No detections found to delete")
@@ -200,7 +407,7 @@ async def bulk_delete_detections(request: BulkDeleteRequest = Body(...)):
     # Delete image files if ImageManager is available
     if image_manager and image_paths:
         try:
-            image_manager.delete_image_files(image_paths)
+            await asyncio.to_thread(image_manager.delete_image_files, image_paths)
         except Exception as e:
             logger.warning(f"Could not delete some image files: {e}")
     
@@ -214,7 +421,8 @@ async def bulk_delete_detections(request: BulkDeleteRequest = Body(...)):
 async def bulk_delete_detections_by_filter(request: BulkDeleteByFilterRequest = Body(...)):
     """Delete detections matching filter criteria."""
     # Delete detections and get image paths
-    deleted_count, image_paths = db.delete_detections_by_filter(
+    deleted_count, image_paths = await run_db(
+        db.delete_detections_by_filter,
         category=request.category,
         start_date=request.start_date,
         end_date=request.end_date,
@@ -228,7 +436,7 @@ async def bulk_delete_detections_by_filter(request: BulkDeleteByFilterRequest =
     # Delete image files if ImageManager is available
     if image_manager and image_paths:
         try:
-            image_manager.delete_image_files(image_paths)
+            await asyncio.to_thread(image_manager.delete_image_files, image_paths)
         except Exception as e:
             logger.warning(f"Could not delete some image files: {e}")
     
@@ -244,7 +452,7 @@ async def delete_orphaned_images():
     if not image_manager:
         raise HTTPException(status_code=503, detail="ImageManager not available")
     
-    deleted_count = image_manager.delete_orphaned_images()
+    deleted_count = await asyncio.to_thread(image_manager.delete_orphaned_images)
     
     return BulkDeleteResponse(
         deleted_count=deleted_count,
@@ -259,7 +467,8 @@ async def delete_images_by_date_range(
 ):
     """Delete images within a date range (also deletes associated detections)."""
     # First delete detections in date range
-    deleted_count, image_paths = db.delete_detections_by_filter(
+    deleted_count, image_paths = await run_db(
+        db.delete_detections_by_filter,
         start_date=start_date,
         end_date=end_date
     )
@@ -267,7 +476,7 @@ async def delete_images_by_date_range(
     # Delete image files if ImageManager is available
     if image_manager and image_paths:
         try:
-            image_manager.delete_image_files(image_paths)
+            await asyncio.to_thread(image_manager.delete_image_files, image_paths)
         except Exception as e:
             logger.warning(f"Could not delete some image files: {e}")
     
@@ -278,19 +487,31 @@ async def delete_images_by_date_range(
 
 # Get statistics
 @app.get("/api/stats", response_model=StatsResponse)
-async def get_stats():
+async def get_stats(request: Request, response: Response):
     """Get statistics about detections."""
-    stats = db.get_stats()
-    return StatsResponse(**stats)
+    # The 24h/7d windows slide with the clock, so the tag turns over every minute too
+    etag, not_modified = await check_data_etag(request, datetime.now().strftime('-%Y%m%d%H%M'))
+    if not_modified:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=etag_headers(etag))
+    stats = await run_db(db.get_stats)
+    response.headers.update(etag_headers(etag))
+    # Typed by the query already; skip re-validating trusted rows
+    return StatsResponse.model_construct(**stats)
+
+@async_ttl_cached(WEATHER_CACHE_TTL)
+async def fetch_weather(zip_code: str) -> Optional[dict]:
+    # get_weather_for_zip uses blocking requests; keep it off the event loop
+    return await asyncio.to_thread(get_weather_for_zip, zip_code)
 
 # Get current weather
 @app.get("/api/weather", response_model=WeatherResponse)
-async def get_current_weather():
+async def get_current_weather(response: Response):
     """Get current weather conditions."""
     zip_code = config.get('zip_code', '34232')
     try:
-        weather_data = get_weather_for_zip(zip_code)
+        weather_data = await fetch_weather(zip_code)
         if weather_data:
+            response.headers['Cache-Control'] = f'public, max-age={int(WEATHER_CACHE_TTL)}'
             return WeatherResponse(**weather_data)
         else:
             raise HTTPException(status_code=503, detail="Weather service unavailable")
@@ -302,32 +523,33 @@ async def get_current_weather():
 @app.get("/api/live")
 async def get_live():
     """Get a live frame from the capture service."""
-    capture_url = config['capture_service_url']
-    
     try:
         # Request live frame from capture service
         # Increased timeout since capturing a frame can take a moment
-        response = requests.get(
-            f"{capture_url}/capture/live",
-            timeout=15
-        )
+        upstream = app.state.http.build_request("GET", "/capture/live", timeout=15)
+        response = await app.state.http.send(upstream, stream=True)
         
         if response.status_code == 503:
+            await response.aclose()
             raise HTTPException(status_code=503, detail="Capture service unavailable or camera not connected")
         
-        response.raise_for_status()
+        if response.is_error:
+            await response.aclose()
+            response.raise_for_status()
         
-        # Return the image directly as a streaming response
+        # Relay the frame chunk by chunk as it arrives; the upstream response
+        # is closed once the client has read it all
         return StreamingResponse(
-            iter([response.content]),
+            response.aiter_bytes(64 * 1024),
             media_type='image/jpeg',
             headers={
                 'Cache-Control': 'no-cache, no-store, must-revalidate',
                 'Pragma': 'no-cache',
                 'Expires': '0'
-            }
+            },
+            background=BackgroundTask(response.aclose)
         )
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         logger.error(f"Error requesting live frame from capture service: {e}")
         raise HTTPException(status_code=503, detail=f"Failed to get live frame: {str(e)}")
 
@@ -335,12 +557,8 @@ async def get_live():
 @app.get("/api/capture-snapshot")
 async def get_capture_snapshot():
     """Fetch a high-quality snapshot via the capture service."""
-    capture_url = config['capture_service_url']
     try:
-        response = requests.get(
-            f"{capture_url}/capture/snapshot",
-            timeout=10
-        )
+        response = await app.state.http.get("/capture/snapshot", timeout=10)
         if response.status_code != 200:
             raise HTTPException(status_code=response.status_code, detail="Snapshot unavailable")
         return StreamingResponse(
@@ -352,13 +570,58 @@ async def get_capture_snapshot():
                 'Expires': '0'
             }
         )
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         logger.error(f"Error requesting snapshot from capture service: {e}")
         raise HTTPException(status_code=503, detail=f"Failed to get snapshot: {str(e)}")
 
+# Media URLs aren't versioned: a file can be recompressed or thumbnailed in
+# place, or deleted and its name reused, so caches keep it only briefly and
+# then revalidate with the ETag (a cheap 304 when unchanged)
+MEDIA_CACHE_CONTROL = 'public, max-age=300, must-revalidate'
+
+def resolve_media_path(relative_path: str, detail: str) -> Path:
+    """Resolved path of relative_path under IMAGES_ROOT; 403 if it escapes the root."""
+    full_path = (IMAGES_ROOT / relative_path).resolve()
+    if not str(full_path).startswith(str(IMAGES_ROOT) + os.sep):
+        raise HTTPException(status_code=403, detail=detail)
+    return full_path
+
+def media_file_response(request: Request, full_path: Path, media_type: Optional[str] = None) -> Response:
+    """
+    Response for a file returned by resolve_media_path.
+    
+    The ETag comes from the file's mtime and size, so a revisit with a
+    matching If-None-Match gets an empty 304.
+    
+    With USE_XACCEL the body is left to nginx, which sendfile()s it from an
+    internal location aliased to the same directory, e.g.
+    
+        location /_protected_images/ {
+            internal;
+            alias /app/data/images/;
+            sendfile on;
+            tcp_nopush on;
+        }
+    
+    Otherwise (local/dev) the file is streamed by FileResponse.
+    """
+    stat_result = full_path.stat()
+    etag = f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+    headers = {'ETag': etag, 'Cache-Control': MEDIA_CACHE_CONTROL}
+    if etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    if not config['use_xaccel']:
+        return FileResponse(full_path, media_type=media_type, headers=headers, stat_result=stat_result)
+    relative_path = full_path.relative_to(IMAGES_ROOT)
+    headers['X-Accel-Redirect'] = config['xaccel_prefix'] + quote(relative_path.as_posix())
+    return Response(
+        media_type=media_type or mimetypes.guess_type(full_path.name)[0] or 'application/octet-stream',
+        headers=headers
+    )
+
 # Serve images
 @app.get("/api/images/{image_path:path}")
-async def get_image(image_path: str, size: Optional[str] = Query(None, description="Image size: 'thumb' for thumbnail")):
+async def get_image(request: Request, image_path: str, size: Optional[str] = Query(None, description="Image size: 'thumb' for thumbnail")):
     """Serve images from the shared volume. Use ?size=thumb for thumbnails."""
     # If thumbnail requested, modify path
     if size == 'thumb':
@@ -368,22 +631,17 @@ async def get_image(image_path: str, size: Optional[str] = Query(None, descripti
             path_parts.insert(-1, 'thumbnails')
             image_path = '/'.join(path_parts)
     
-    full_path = Path(config['images_path']) / image_path
-    
     # Security: prevent directory traversal
-    try:
-        full_path.resolve().relative_to(Path(config['images_path']).resolve())
-    except ValueError:
-        raise HTTPException(status_code=403, detail="Invalid image path")
+    full_path = resolve_media_path(image_path, "Invalid image path")
     
     if not full_path.exists():
         raise HTTPException(status_code=404, detail="Image not found")
     
-    return FileResponse(full_path)
+    return media_file_response(request, full_path)
 
 # Serve thumbnails
 @app.get("/api/images/{image_path:path}/thumbnail")
-async def get_thumbnail(image_path: str):
+async def get_thumbnail(request: Request, image_path: str):
     """Serve thumbnail for an image."""
     # Insert 'thumbnails' directory before filename
     path_parts = image_path.split('/')
@@ -393,29 +651,19 @@ async def get_thumbnail(image_path: str):
     else:
         raise HTTPException(status_code=400, detail="Invalid image path format")
     
-    full_path = Path(config['images_path']) / thumbnail_path
-    
     # Security: prevent directory traversal
-    try:
-        full_path.resolve().relative_to(Path(config['images_path']).resolve())
-    except ValueError:
-        raise HTTPException(status_code=403, detail="Invalid image path")
+    full_path = resolve_media_path(thumbnail_path, "Invalid image path")
     
     if not full_path.exists():
         raise HTTPException(status_code=404, detail="Thumbnail not found")
     
-    return FileResponse(full_path)
+    return media_file_response(request, full_path)
 
 @app.get("/api/videos/{video_path:path}")
-async def get_video(video_path: str):
+async def get_video(request: Request, video_path: str):
     """Serve video files from the shared volume."""
-    full_path = Path(config['images_path']) / video_path
-    
     # Security: prevent directory traversal
-    try:
-        full_path.resolve().relative_to(Path(config['images_path']).resolve())
-    except ValueError:
-        raise HTTPException(status_code=403, detail="Invalid video path")
+    full_path = resolve_media_path(video_path, "Invalid video path")
     
     if not full_path.exists():
         raise HTTPException(status_code=404, detail="Video not found")
@@ -427,14 +675,14 @@ async def get_video(video_path: str):
     elif video_path.lower().endswith('.avi'):
         content_type = "video/x-msvideo"
     
-    return FileResponse(full_path, media_type=content_type)
+    return media_file_response(request, full_path, media_type=content_type)
 
 # Annotation endpoints
 @app.post("/api/detections/{detection_id}/annotate", response_model=AnnotationResponse)
 async def annotate_detection(detection_id: int, request: AnnotationRequest = Body(...)):
     """Create or update an annotation for a detection."""
     # First check if detection exists
-    detection = db.get_detection_by_id(detection_id)
+    detection = await run_db(db.get_detection_by_id, detection_id)
     if not detection:
         raise HTTPException(status_code=404, detail="Detection not found")
     
@@ -451,8 +699,9 @@ async def annotate_detection(detection_id: int, request: AnnotationRequest = Bod
         elif detection.get('is_human'):
             incorrect_class = 'human'
     
-    # Create or update annotation
-    annotation_id = db.create_or_update_annotation(
+    # Create or update annotation (the stored row comes back with it)
+    annotation = await run_db(
+        db.create_or_update_annotation,
         detection_id=detection_id,
         is_correct=request.is_correct,
         correct_class=request.correct_class,
@@ -460,25 +709,20 @@ async def annotate_detection(detection_id: int, request: AnnotationRequest = Bod
         notes=request.notes
     )
     
-    if not annotation_id:
-        raise HTTPException(status_code=500, detail="Failed to create/update annotation")
-    
-    # Get the annotation back
-    annotation = db.get_annotation_by_detection_id(detection_id)
     if not annotation:
-        raise HTTPException(status_code=500, detail="Failed to retrieve created annotation")
+        raise HTTPException(status_code=500, detail="Failed to create/update annotation")
     
-    return AnnotationResponse(**annotation)
+    return AnnotationResponse.model_construct(**annotation)
 
 @app.get("/api/detections/{detection_id}/annotation", response_model=AnnotationResponse)
 async def get_detection_annotation(detection_id: int):
     """Get annotation for a detection."""
-    # Check if detection exists
-    detection = db.get_detection_by_id(detection_id)
+    # The detection lookup already carries its annotation
+    detection = await run_db(db.get_detection_by_id, detection_id)
     if not detection:
         raise HTTPException(status_code=404, detail="Detection not found")
     
-    annotation = db.get_annotation_by_detection_id(detection_id)
+    annotation = detection.get('annotation')
     if not annotation:
         raise HTTPException(status_code=404, detail="Annotation not found")
     
@@ -487,7 +731,7 @@ async def get_detection_annotation(detection_id: int):
 @app.delete("/api/detections/{detection_id}/annotation", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_detection_annotation(detection_id: int):
     """Delete an annotation for a detection."""
-    success = db.delete_annotation(detection_id)
+    success = await run_db(db.delete_annotation, detection_id)
     if not success:
         raise HTTPException(status_code=404, detail="Annotation not found")
     return None
@@ -499,7 +743,8 @@ async def get_annotations(
     is_correct: Optional[bool] = Query(None, description="Filter by correctness")
 ):
     """Get list of annotations with pagination and filters."""
-    annotations, total = db.get_annotations(
+    annotations, total = await run_db(
+        db.get_annotations,
         page=page,
         page_size=page_size,
         is_correct=is_correct
@@ -508,22 +753,15 @@ async def get_annotations(
     total_pages = (total + page_size - 1) // page_size
     
     return AnnotationListResponse(
-        annotations=[AnnotationResponse(**a) for a in annotations],
+        annotations=[AnnotationResponse.model_construct(**a) for a in annotations],
         total=total,
         page=page,
         page_size=page_size,
         total_pages=total_pages
     )
 
-# Serve frontend
-@app.get("/", response_class=HTMLResponse)
-async def serve_frontend():
-    """Serve the frontend HTML page."""
-    index_path = Path(config['static_path']) / "index.html"
-    if index_path.exists():
-        return FileResponse(index_path)
-    else:
-        return HTMLResponse("""
+# Served when static/index.html is missing; encoded once rather than per request
+FALLBACK_HTML = b"""
         <!DOCTYPE html>
         <html>
         <head>
@@ -547,9 +785,22 @@ async def serve_frontend():
             </div>
         </body>
         </html>
-        """)
+        """
+
+INDEX_PATH = STATIC_ROOT / "index.html"
+# The static directory is baked in or mounted before startup
+INDEX_EXISTS = INDEX_PATH.exists()
+
+# Serve frontend
+@app.get("/", response_class=HTMLResponse)
+async def serve_frontend():
+    """Serve the frontend HTML page."""
+    if INDEX_EXISTS:
+        return FileResponse(INDEX_PATH)
+    return HTMLResponse(FALLBACK_HTML)
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # Workers need an import string; each builds its pool in startup_event (post-fork)
+    uvicorn.run("main:app", host="0.0.0.0", port=8000, workers=config['web_concurrency'])
 
@@ -49,6 +49,10 @@ class DetectionListResponse(BaseModel):
     page: int
     page_size: int
     total_pages: int
+    # Keyset cursor for the next page (pass back as cursor, or before_timestamp/before_id)
+    next_before_timestamp: Optional[datetime] = None
+    next_before_id: Optional[int] = None
+    next_cursor: Optional[str] = None
 
 class StatsResponse(BaseModel):
     """Statistics response model."""
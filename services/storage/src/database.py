@@ -16,9 +16,12 @@ class Database:
     def connect(self):
         """Create connection pool to PostgreSQL."""
         try:
-            self.connection_pool = psycopg2.pool.SimpleConnectionPool(
-                1,  # min connections
-                10,  # max connections
+            pool_min = self.config.get('pg_pool_min', 1)
+            pool_max = max(self.config.get('pg_pool_max', 5), pool_min)
+            # ThreadedConnectionPool: the cleanup scheduler runs on its own thread
+            self.connection_pool = psycopg2.pool.ThreadedConnectionPool(
+                pool_min,
+                pool_max,
                 host=self.config['postgres_host'],
                 database=self.config['postgres_db'],
                 user=self.config['postgres_user'],
@@ -26,7 +29,7 @@ class Database:
                 port=self.config.get('postgres_port', 5432)
             )
             if self.connection_pool:
-                logger.info("✓ Database connection pool created")
+                logger.info(f"✓ Database connection pool created (min={pool_min}, max={pool_max})")
                 return True
             else:
                 logger.error("Failed to create database connection pool")
@@ -144,6 +147,30 @@ class Database:
                     ON detections(created_at);
                 """)
                 
+                # Listing order / keyset pagination: (timestamp, id) DESC
+                cur.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_detections_timestamp_id 
+                    ON detections(timestamp DESC, id DESC);
+                """)
+                
+                cur.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_detections_bird_timestamp 
+                    ON detections(timestamp DESC) WHERE is_bird;
+                """)
+                
+                cur.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_detections_category_timestamp 
+                    ON detections(category, timestamp DESC);
+                """)
+                
+                # Birds still missing a name/backstory (scripts/backfill_bird_names.py)
+                cur.execute("""
+                    CREATE INDEX IF NOT EXISTS ix_detections_backfill
+                    ON detections (timestamp DESC)
+                    WHERE is_bird = true
+                      AND (bird_name IS NULL OR bird_backstory IS NULL);
+                """)
+                
                 # Create detection_annotations table for human feedback
                 cur.execute("""
                     CREATE TABLE IF NOT EXISTS detection_annotations (
@@ -175,6 +202,35 @@ class Database:
                     ON detection_annotations(created_at);
                 """)
                 
+                # Single-row change counter behind the API's ETags. Triggers bump
+                # it in the same transaction as every write, so a reader never
+                # sees new data with an old version.
+                cur.execute("""
+                    CREATE TABLE IF NOT EXISTS data_version (
+                        id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+                        version BIGINT NOT NULL DEFAULT 0
+                    );
+                    INSERT INTO data_version (id, version) VALUES (TRUE, 0)
+                    ON CONFLICT (id) DO NOTHING;
+                    
+                    CREATE OR REPLACE FUNCTION bump_data_version() RETURNS trigger AS $$
+                    BEGIN
+                        UPDATE data_version SET version = version + 1;
+                        RETURN NULL;
+                    END;
+                    $$ LANGUAGE plpgsql;
+                    
+                    DROP TRIGGER IF EXISTS trg_detections_data_version ON detections;
+                    CREATE TRIGGER trg_detections_data_version
+                    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON detections
+                    FOR EACH STATEMENT EXECUTE FUNCTION bump_data_version();
+                    
+                    DROP TRIGGER IF EXISTS trg_annotations_data_version ON detection_annotations;
+                    CREATE TRIGGER trg_annotations_data_version
+                    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON detection_annotations
+                    FOR EACH STATEMENT EXECUTE FUNCTION bump_data_version();
+                """)
+                
                 conn.commit()
                 logger.info("✓ Database schema initialized")
                 return True
@@ -246,11 +302,10 @@ class Database:
         
         try:
             with conn.cursor() as cur:
-                # Use parameterized query with tuple for IN clause
-                placeholders = ','.join(['%s'] * len(detection_ids))
+                # One array parameter: a single statement whatever the number of ids
                 cur.execute(
-                    f"DELETE FROM detections WHERE id IN ({placeholders})",
-                    tuple(detection_ids)
+                    "DELETE FROM detections WHERE id = ANY(%s)",
+                    (list(detection_ids),)
                 )
                 deleted_count = cur.rowcount
                 conn.commit()
@@ -274,10 +329,9 @@ class Database:
         
         try:
             with conn.cursor() as cur:
-                placeholders = ','.join(['%s'] * len(detection_ids))
                 cur.execute(
-                    f"SELECT image_path FROM detections WHERE id IN ({placeholders})",
-                    tuple(detection_ids)
+                    "SELECT image_path FROM detections WHERE id = ANY(%s)",
+                    (list(detection_ids),)
                 )
                 rows = cur.fetchall()
                 return [row[0] for row in rows]
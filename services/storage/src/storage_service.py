@@ -334,6 +334,8 @@ def load_config():
         'postgres_db': os.getenv('POSTGRES_DB', 'birdmonitor'),
         'postgres_user': os.getenv('POSTGRES_USER', 'birdmonitor'),
         'postgres_password': os.getenv('POSTGRES_PASSWORD', 'changeme265'),
+        'pg_pool_min': int(os.getenv('DB_POOL_MIN_SIZE', 1)),
+        'pg_pool_max': int(os.getenv('DB_POOL_MAX_SIZE', 5)),
         'zip_code': os.getenv('ZIP_CODE', '34232'),
         # Image management settings
         'image_retention_days': int(os.getenv('IMAGE_RETENTION_DAYS', '90')),
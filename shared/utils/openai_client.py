@@ -2,29 +2,151 @@
 OpenAI client utility for generating bird names and backstories.
 """
 import os
+import re
+import time
+import random
 import logging
+import functools
+import threading
 from typing import Optional, Tuple
-from openai import OpenAI
+from openai import OpenAI, APIConnectionError, APIStatusError, RateLimitError
 
 logger = logging.getLogger(__name__)
 
+
+def _retry_after_seconds(error: APIStatusError) -> float:
+    """Return the server-requested wait from a Retry-After header, or 0."""
+    try:
+        return float(error.response.headers.get('retry-after', 0))
+    except (AttributeError, TypeError, ValueError):
+        return 0.0
+
+
+def backoff_retry(max_tries: int = 8, base: float = 1.0, cap: float = 60.0, jitter=random.random,
+                  stop_event: Optional[threading.Event] = None):
+    """
+    Retry transient OpenAI failures with exponential backoff and jitter.
+    
+    Rate limits (429), server errors (5xx) and connection errors are retried;
+    a 429 waits at least as long as its Retry-After header. Other 4xx errors
+    are raised immediately. Once stop_event is set, the pending backoff is cut
+    short and the last error raised instead of retrying.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            for attempt in range(max_tries):
+                try:
+                    return func(*args, **kwargs)
+                except (APIStatusError, APIConnectionError) as e:
+                    if isinstance(e, APIStatusError) and not isinstance(e, RateLimitError) and e.status_code < 500:
+                        raise
+                    if attempt == max_tries - 1 or (stop_event is not None and stop_event.is_set()):
+                        raise
+                    delay = min(cap, base * 2 ** attempt) * (0.5 + jitter())
+                    if isinstance(e, RateLimitError):
+                        delay = max(delay, _retry_after_seconds(e))
+                    logger.warning(
+                        f"OpenAI request failed ({type(e).__name__}), "
+                        f"retrying in {delay:.1f}s (attempt {attempt + 1}/{max_tries})"
+                    )
+                    if stop_event is not None:
+                        if stop_event.wait(delay):
+                            raise
+                    else:
+                        time.sleep(delay)
+        return wrapper
+    return decorator
+
+
+_DURATION_PART = re.compile(r'(\d+(?:\.\d+)?)(ms|s|m|h)')
+_DURATION_UNITS = {'ms': 0.001, 's': 1.0, 'm': 60.0, 'h': 3600.0}
+
+
+def _parse_reset(value: Optional[str]) -> float:
+    """Parse an x-ratelimit-reset-* duration such as '1s', '6m0s' or '20ms' into seconds."""
+    if not value:
+        return 0.0
+    return sum(float(n) * _DURATION_UNITS[unit] for n, unit in _DURATION_PART.findall(value))
+
+
+class RateLimitPacer:
+    """
+    Paces requests from the x-ratelimit-* response headers.
+    
+    When remaining requests or tokens fall to 10% of the limit, callers wait
+    for the window to reset instead of running into a 429.
+    """
+    
+    def __init__(self, threshold: float = 0.1):
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        # kind -> [limit, remaining, reset_at (monotonic)]
+        self._state = {}
+    
+    def update(self, headers) -> None:
+        """Record the limits reported by a response."""
+        now = time.monotonic()
+        with self._lock:
+            for kind in ('requests', 'tokens'):
+                try:
+                    limit = int(headers.get(f'x-ratelimit-limit-{kind}'))
+                    remaining = int(headers.get(f'x-ratelimit-remaining-{kind}'))
+                except (TypeError, ValueError):
+                    continue
+                reset_at = now + _parse_reset(headers.get(f'x-ratelimit-reset-{kind}'))
+                self._state[kind] = [limit, remaining, reset_at]
+    
+    def wait(self, stop_event: Optional[threading.Event] = None) -> None:
+        """Sleep until the nearly exhausted window resets (or stop_event is set), then count this request."""
+        with self._lock:
+            now = time.monotonic()
+            delay = 0.0
+            for limit, remaining, reset_at in self._state.values():
+                if remaining <= max(2, self.threshold * limit) and reset_at > now:
+                    delay = max(delay, reset_at - now)
+            requests = self._state.get('requests')
+            if requests:
+                # Count in-flight requests until the next response refreshes the budget
+                requests[1] -= 1
+        if delay > 0:
+            logger.info(f"Approaching OpenAI rate limit, pausing {delay:.1f}s")
+            if stop_event is not None:
+                stop_event.wait(delay)
+            else:
+                time.sleep(delay)
+
+
 class OpenAIBirdNamer:
     """Handles OpenAI API calls for bird naming and backstory generation."""
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, max_tries: int = 2, retry_cap: float = 5.0,
+                 stop_event: Optional[threading.Event] = None):
         """
         Initialize OpenAI client.
         
         Args:
             api_key: OpenAI API key. If None, will try to get from OPENAI_API_KEY env var.
+            max_tries: Attempts per request, retrying transient errors. The
+                default keeps live ingest from stalling on an OpenAI outage;
+                batch jobs such as the backfill can afford a larger budget.
+            retry_cap: Upper bound in seconds on a single backoff delay.
+            stop_event: When set, backoff and rate-limit pauses end early and
+                no further retries are made (used to shut down promptly).
         """
         self.api_key = api_key or os.getenv('OPENAI_API_KEY')
         self.client = None
         self.enabled = bool(self.api_key)
+        self.pacer = RateLimitPacer()
+        self.stop_event = stop_event
+        self._create_completion = backoff_retry(
+            max_tries=max_tries, base=1.0, cap=retry_cap, stop_event=stop_event
+        )(self._request_completion)
         
         if self.enabled:
             try:
-                self.client = OpenAI(api_key=self.api_key)
+                # Retries are handled by backoff_retry rather than the SDK
+                self.client = OpenAI(api_key=self.api_key, max_retries=0)
                 logger.info("OpenAI client initialized")
             except Exception as e:
                 logger.error(f"Failed to initialize OpenAI client: {e}")
@@ -32,6 +154,20 @@ class OpenAIBirdNamer:
         else:
             logger.info("OpenAI integration disabled (no API key provided)")
     
+    def _request_completion(self, prompt: str, temperature: float, max_tokens: int):
+        """Send a single-prompt chat completion request (retried as _create_completion)."""
+        self.pacer.wait(self.stop_event)
+        raw = self.client.chat.completions.with_raw_response.create(
+            model="gpt-4o-mini",
+            messages=[
+                {"role": "user", "content": prompt}
+            ],
+            temperature=temperature,
+            max_tokens=max_tokens
+        )
+        self.pacer.update(raw.headers)
+        return raw.parse()
+    
     def generate_bird_name(self) -> Optional[str]:
         """
         Generate a whimsical but plausible human first name for a bird.
@@ -49,14 +185,7 @@ The name should sound like a person's name that you might meet at a diner, not a
 Output just the name — one word, capitalized — nothing else."""
         
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.8,
-                max_tokens=20
-            )
+            response = self._create_completion(prompt, temperature=0.8, max_tokens=20)
             
             name = response.choices[0].message.content.strip()
             # Clean up the name - remove any quotes, extra whitespace, etc.
@@ -107,14 +236,7 @@ Feel self-contained and humorous even out of context.
 Output only the two sentences, with no headings or meta text."""
         
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.9,
-                max_tokens=150
-            )
+            response = self._create_completion(prompt, temperature=0.9, max_tokens=150)
             
             backstory = response.choices[0].message.content.strip()
             logger.info(f"Generated backstory for {bird_name}")